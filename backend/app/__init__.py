@@ -7,8 +7,8 @@ from flask_mail import Mail
 from flask_caching import Cache
 from celery import Celery
 import os
+from importlib import import_module
 from dotenv import load_dotenv
-from datetime import date
 
 # Load environment variables
 load_dotenv()
@@ -21,7 +21,24 @@ mail = Mail()
 cache = Cache()
 celery = Celery()
 
-def create_app(config_name='development'):
+# (module, blueprint, URL prefix); route modules are only imported by apps that serve HTTP
+BLUEPRINTS = [
+    ('app.routes.auth', 'auth_bp', '/api/auth'),
+    ('app.routes.admin', 'admin_bp', '/api/admin'),
+    ('app.routes.user', 'user_bp', '/api/user'),
+    ('app.routes.quiz', 'quiz_bp', '/api/quiz')
+]
+
+def register_blueprints(app):
+    for module, name, url_prefix in BLUEPRINTS:
+        app.register_blueprint(getattr(import_module(module), name), url_prefix=url_prefix)
+
+def create_app(config_name='development', with_blueprints=True):
+    """
+    Build the app without touching the database; the schema and the admin
+    account are set up by `flask init-db` (see app.commands).
+    Background workers pass with_blueprints=False to skip the routes.
+    """
     app = Flask(__name__)
     
     # --- FIX: Enable CORS for the application ---
@@ -34,10 +51,31 @@ def create_app(config_name='development'):
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///quiz_master.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Connection pool for server databases; SQLite keeps SQLAlchemy's defaults
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 20),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 30),
+            'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),  # seconds
+            'pool_pre_ping': True
+        }
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = False  # For development
     
-    # Redis configuration
-    app.config['CACHE_TYPE'] = 'redis'
+    # Password hashing: 'bcrypt' (cost PASSWORD_HASH_ROUNDS) or a werkzeug method such as 'scrypt'.
+    # Hashes run on PASSWORD_HASH_WORKERS threads per process (default: CPU count); beyond
+    # PASSWORD_HASH_QUEUE_MAX waiting calls, logins get a 503. Old hashes are upgraded on login.
+    app.config['PASSWORD_HASH_ALGORITHM'] = os.environ.get('PASSWORD_HASH_ALGORITHM') or 'bcrypt'
+    app.config['PASSWORD_HASH_ROUNDS'] = int(os.environ.get('PASSWORD_HASH_ROUNDS') or 12)
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS') or 0) or None
+    app.config['PASSWORD_HASH_QUEUE_MAX'] = int(os.environ.get('PASSWORD_HASH_QUEUE_MAX') or 64)
+    
+    # Seconds between batched writes of users' last_login (0 writes on every login)
+    app.config['LAST_LOGIN_FLUSH_INTERVAL'] = int(os.environ.get('LAST_LOGIN_FLUSH_INTERVAL') or 60)
+    
+    # Redis configuration; another CACHE_TYPE (e.g. SimpleCache) keeps quiz
+    # sessions and leaderboards in process memory, for single-process setups
+    app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE') or 'redis'
     app.config['CACHE_REDIS_URL'] = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
     
     # Mail configuration
@@ -46,6 +84,28 @@ def create_app(config_name='development'):
     app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
     app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
     app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER') or app.config['MAIL_USERNAME']
+    
+    # Mail delivery (see app.utils.mailer.MailDispatcher)
+    app.config['MAIL_BACKEND'] = os.environ.get('MAIL_BACKEND') or 'smtp'  # 'smtp' or 'file'
+    app.config['MAIL_FILE_SINK_DIR'] = os.environ.get('MAIL_FILE_SINK_DIR')
+    app.config['MAIL_BATCH_SIZE'] = int(os.environ.get('MAIL_BATCH_SIZE') or 100)
+    app.config['MAIL_RATE_LIMIT'] = float(os.environ.get('MAIL_RATE_LIMIT') or 0)  # messages/sec, 0 = unlimited
+    app.config['MAIL_MAX_RETRIES'] = int(os.environ.get('MAIL_MAX_RETRIES') or 3)
+    app.config['MAIL_RETRY_BACKOFF'] = float(os.environ.get('MAIL_RETRY_BACKOFF') or 1.0)
+    # Attach a PDF copy (rendered with reportlab) to monthly report emails
+    app.config['MONTHLY_REPORT_PDF'] = os.environ.get('MONTHLY_REPORT_PDF', 'false').lower() in ['true', 'on', '1']
+    
+    # Exports are written here and linked through BACKEND_URL
+    app.config['EXPORT_DIR'] = os.environ.get('EXPORT_DIR')
+    app.config['BACKEND_URL'] = os.environ.get('BACKEND_URL') or 'http://localhost:5000'
+    
+    # How a quiz attempt's answers are stored: 'rows' (one user_answers row per
+    # question) or 'packed' (a 4-bit mask per question on the score itself)
+    app.config['ANSWER_STORAGE'] = os.environ.get('ANSWER_STORAGE') or 'rows'
+    
+    # Quiz sessions outlive the quiz duration by this many seconds, for the final submit
+    app.config['QUIZ_SESSION_GRACE'] = int(os.environ.get('QUIZ_SESSION_GRACE') or 30)
     
     # Celery configuration
     app.config['CELERY_BROKER_URL'] = os.environ.get('CELERY_BROKER_URL') or 'redis://localhost:6379/1'
@@ -53,7 +113,7 @@ def create_app(config_name='development'):
     
     # Initialize extensions with app
     db.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, render_as_batch=True)
     jwt.init_app(app)
     mail.init_app(app)
     cache.init_app(app)
@@ -70,33 +130,11 @@ def create_app(config_name='development'):
     )
     
     # Register blueprints
-    from app.routes.auth import auth_bp
-    from app.routes.admin import admin_bp
-    from app.routes.user import user_bp
-    from app.routes.quiz import quiz_bp
-    
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(admin_bp, url_prefix='/api/admin')
-    app.register_blueprint(user_bp, url_prefix='/api/user')
-    app.register_blueprint(quiz_bp, url_prefix='/api/quiz')
-    
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        
-        # Create admin user if not exists
-        from app.models.user import User
-        admin = User.query.filter_by(email=os.environ.get('ADMIN_EMAIL', 'admin@quizmaster.com')).first()
-        if not admin:
-            admin = User(
-                email=os.environ.get('ADMIN_EMAIL', 'admin@quizmaster.com'),
-                full_name='Administrator',
-                role='admin',
-                qualification='System Admin',
-                dob=date(1990, 1, 1)
-            )
-            admin.set_password(os.environ.get('ADMIN_PASSWORD', 'admin123'))
-            db.session.add(admin)
-            db.session.commit()
+    if with_blueprints:
+        register_blueprints(app)
+    
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
     
     return app
@@ -0,0 +1,150 @@
+# Flask CLI commands for setup and maintenance jobs
+import os
+import click
+from datetime import date
+from flask.cli import with_appcontext
+from app import db
+
+# Revision matching the schema db.create_all() built before the migrations existed
+INITIAL_REVISION = 'e7a5b3d0673d'
+
+def ensure_admin(email, password):
+    """Create the admin account unless a user with that email exists; returns True if created"""
+    from app.models.user import User
+    if User.query.filter_by(email=email).first():
+        return False
+    admin = User(
+        email=email,
+        full_name='Administrator',
+        role='admin',
+        qualification='System Admin',
+        dob=date(1990, 1, 1)
+    )
+    admin.set_password(password)
+    db.session.add(admin)
+    db.session.commit()
+    return True
+
+@click.command('create-admin')
+@with_appcontext
+@click.option('--email', default=lambda: os.environ.get('ADMIN_EMAIL', 'admin@quizmaster.com'), show_default='ADMIN_EMAIL')
+@click.option('--password', default=lambda: os.environ.get('ADMIN_PASSWORD', 'admin123'), show_default='ADMIN_PASSWORD')
+def create_admin(email, password):
+    """Create the admin account if it does not exist."""
+    if ensure_admin(email, password):
+        click.echo(f'Created admin {email}')
+    else:
+        click.echo(f'Admin {email} already exists')
+
+@click.command('init-db')
+@with_appcontext
+@click.option('--no-admin', is_flag=True, help='Only create or upgrade the schema.')
+def init_db(no_admin):
+    """Create or upgrade the schema through the migrations, then create the admin account."""
+    from flask_migrate import stamp, upgrade
+    from sqlalchemy import inspect
+    tables = inspect(db.engine).get_table_names()
+    if tables and 'alembic_version' not in tables:
+        # Built by db.create_all(): record it as the initial schema so upgrade() only alters it
+        stamp(revision=INITIAL_REVISION)
+        click.echo(f'Stamped the existing schema as revision {INITIAL_REVISION}')
+    upgrade()
+    click.echo('Database schema is up to date')
+    if not no_admin:
+        email = os.environ.get('ADMIN_EMAIL', 'admin@quizmaster.com')
+        if ensure_admin(email, os.environ.get('ADMIN_PASSWORD', 'admin123')):
+            click.echo(f'Created admin {email}')
+
+@click.command('rebuild-user-stats')
+@with_appcontext
+@click.option('--user-id', 'user_ids', type=int, multiple=True,
+              help='Only rebuild these users (repeatable). Defaults to every user.')
+def rebuild_user_stats(user_ids):
+    """Recompute the user_stats summary table from scores."""
+    from app.models.user_stats import UserStats
+    count = UserStats.rebuild(list(user_ids) or None)
+    db.session.commit()
+    click.echo(f'Rebuilt statistics for {count} users')
+
+@click.command('check-query-plans')
+@with_appcontext
+@click.option('--verbose', is_flag=True, help='Print every query plan.')
+def check_query_plans(verbose):
+    """Fail if a hot query shape is planned as a full table scan."""
+    from app.utils.query_plans import EXPLAIN_DIALECTS, hot_queries, explain, table_scans
+    if db.engine.dialect.name not in EXPLAIN_DIALECTS:
+        click.echo(f'No query plan check for {db.engine.dialect.name}, skipped')
+        return
+    failed = 0
+    for name, query in hot_queries():
+        plan = explain(query)
+        scans = table_scans(plan)
+        click.echo(f"{'SCAN' if scans else 'ok'}  {name}" + (f" (full scan of {', '.join(scans)})" if scans else ''))
+        if verbose or scans:
+            for line in plan:
+                click.echo(f'      {line}')
+        failed += bool(scans)
+    if failed:
+        raise click.ClickException(f'{failed} hot queries are not served by an index')
+
+@click.command('check-query-counts')
+@click.option('--users', default=20, show_default=True, help='Sample users, each with an attempt on every quiz.')
+@click.option('--verbose', is_flag=True, help='Print every statement.')
+def check_query_counts(users, verbose):
+    """Fail if an endpoint issues more SQL statements than its cap, on a scratch database."""
+    from app.utils.query_counts import create_scratch_app, seed_sample_data, count_endpoint_queries
+    app = create_scratch_app()
+    with app.app_context():
+        admin_id, user_id = seed_sample_data(users=users)
+    failed = 0
+    for name, path, statements, cap in count_endpoint_queries(app, {'admin': admin_id, 'user': user_id}):
+        over = len(statements) > cap
+        click.echo(f"{'OVER' if over else 'ok'}  {name}: {len(statements)} statements (cap {cap})")
+        if verbose or over:
+            for statement in statements:
+                click.echo(f"      {' '.join(statement.split())[:200]}")
+        failed += over
+    if failed:
+        raise click.ClickException(f'{failed} endpoints issue more statements than their cap')
+
+@click.command('prune-answer-rows')
+@with_appcontext
+def prune_answer_rows():
+    """Delete user_answers rows of attempts that are also stored as a packed sheet."""
+    from app.models.answer import UserAnswer
+    from app.models.score import Score
+    packed = db.session.query(Score.id).filter(Score.packed_answers.isnot(None))
+    count = UserAnswer.query.filter(UserAnswer.score_id.in_(packed)).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f'Deleted {count} answer rows of packed attempts')
+
+@click.command('rebuild-leaderboards')
+@with_appcontext
+def rebuild_leaderboards():
+    """Reload the quiz and subject leaderboards from scores."""
+    from app.utils.leaderboards import REBUILD_LOCK_TIMEOUT, rebuild_leaderboards as rebuild
+    count = rebuild(wait=REBUILD_LOCK_TIMEOUT)
+    if count is None:
+        raise click.ClickException('Another leaderboard rebuild is still running')
+    click.echo(f'Rebuilt {count} leaderboards')
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index():
+    """Re-index every question, quiz and chapter for full-text search."""
+    from app.utils.search import rebuild_search_index as rebuild
+    count = rebuild()
+    if count is None:
+        click.echo(f'No search index on this {db.engine.dialect.name} database; search uses LIKE matching')
+    else:
+        click.echo(f'Indexed {count} questions, quizzes and chapters')
+
+def register_commands(app):
+    app.cli.add_command(init_db)
+    app.cli.add_command(create_admin)
+    app.cli.add_command(rebuild_user_stats)
+    app.cli.add_command(check_query_plans)
+    app.cli.add_command(check_query_counts)
+    app.cli.add_command(prune_answer_rows)
+    app.cli.add_command(rebuild_leaderboards)
+    app.cli.add_command(rebuild_search_index)
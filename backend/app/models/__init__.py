@@ -4,6 +4,7 @@ from .user import User
 from .subject import Subject, Chapter
 from .quiz import Quiz, Question
 from .score import Score
-from .answer import UserAnswer
+from .answer import UserAnswer, AnswerMap
+from .user_stats import UserStats
 
-__all__ = ['User', 'Subject', 'Chapter', 'Quiz', 'Question', 'Score', 'UserAnswer']
+__all__ = ['User', 'Subject', 'Chapter', 'Quiz', 'Question', 'Score', 'UserAnswer', 'AnswerMap', 'UserStats']
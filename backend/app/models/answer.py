@@ -1,7 +1,73 @@
 from app import db
 from sqlalchemy.sql import func
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, event
+from sqlalchemy.orm import Session
 from app.utils.helpers import to_ist
+from app.utils.quiz_cache import LRUCache, get_versioned
+
+# Per-process caches: {question_ids: map id} per quiz version, and the immutable maps by id
+_quiz_maps = LRUCache(maxsize=512)
+_maps_by_id = LRUCache(maxsize=1024)
+PENDING_MAPS = 'pending_answer_maps'  # session.info key: maps added by the open transaction
+
+class AnswerMap(db.Model):
+    """
+    Question order of packed answer sheets (Score.packed_answers).
+    Every attempt graded against the same set of questions shares one map,
+    so a map is only added when a quiz's questions change.
+    """
+    __tablename__ = 'answer_maps'
+
+    id = db.Column(db.Integer, primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False, index=True)
+    question_ids = db.Column(db.Text, nullable=False)  # Comma separated, in sheet order
+    created_at = db.Column(db.DateTime, default=lambda: to_ist())
+
+    quiz = db.relationship('Quiz', backref=db.backref('answer_maps', lazy=True, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<AnswerMap {self.id} Quiz:{self.quiz_id}>'
+
+    @classmethod
+    def id_for(cls, quiz_id, question_ids):
+        """
+        Return the id of the map for a question order, adding the map if it is new.
+        A new map is only cached once its transaction commits, so a rolled back
+        submit never leaves the cache pointing at a missing row.
+        """
+        key = ','.join(map(str, question_ids))
+        maps = get_versioned(_quiz_maps, quiz_id, lambda quiz_id: dict(
+            db.session.query(cls.question_ids, cls.id).filter_by(quiz_id=quiz_id).all()))
+        if key in maps:
+            return maps[key]
+        pending = db.session.info.setdefault(PENDING_MAPS, {})
+        if (quiz_id, key) not in pending:
+            answer_map = cls(quiz_id=quiz_id, question_ids=key)
+            db.session.add(answer_map)
+            db.session.flush()
+            pending[quiz_id, key] = answer_map.id
+        return pending[quiz_id, key]
+
+    @classmethod
+    def question_ids_of(cls, map_id):
+        """The question ids of a map, in sheet order; maps never change once written"""
+        question_ids = _maps_by_id.get(map_id)
+        if question_ids is None:
+            value = db.session.query(cls.question_ids).filter_by(id=map_id).scalar() or ''
+            question_ids = [int(question_id) for question_id in value.split(',') if question_id]
+            _maps_by_id.set(map_id, question_ids)
+        return question_ids
+
+@event.listens_for(Session, 'after_commit')
+def _cache_committed_maps(session):
+    for (quiz_id, key), map_id in session.info.pop(PENDING_MAPS, {}).items():
+        entry = _quiz_maps.get(quiz_id)
+        if entry is not None:
+            entry[1][key] = map_id
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_maps(session):
+    session.info.pop(PENDING_MAPS, None)
 
 class UserAnswer(db.Model):
     __tablename__ = 'user_answers'
@@ -9,20 +75,89 @@ class UserAnswer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
+    score_id = db.Column(db.Integer, db.ForeignKey('scores.id'))  # The attempt; NULL only for orphaned legacy rows
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
-    selected_option = db.Column(db.Integer, nullable=False) # Stores 1, 2, 3, or 4
+    selected_option = db.Column(db.String(7), nullable=False)  # '0' (blank), '1'-'4', or '1,3' for several
     attempt_timestamp = db.Column(db.DateTime(timezone=True), default=lambda: to_ist())
 
     # Relationships
     user = db.relationship('User', backref=db.backref('answers', lazy=True))
     quiz = db.relationship('Quiz', backref=db.backref('answers', lazy=True))
     question = db.relationship('Question', backref=db.backref('answers', lazy=True))
+    score = db.relationship('Score', backref=db.backref('answers', lazy=True, cascade='all, delete-orphan'))
 
-    # Ensures a user can only answer a specific question in a quiz once
-    __table_args__ = (UniqueConstraint('user_id', 'quiz_id', 'question_id', name='_user_quiz_question_uc'),)
+    # Ensures a question is answered once per attempt; retakes keep their own rows.
+    # (user_id, quiz_id) serves a user's answers, e.g. when the user is deleted.
+    __table_args__ = (UniqueConstraint('score_id', 'question_id', name='_score_question_uc'),
+                      db.Index('ix_user_answers_user_id_quiz_id', 'user_id', 'quiz_id'))
 
     def __repr__(self):
         return f'<UserAnswer User:{self.user_id} Quiz:{self.quiz_id} Q:{self.question_id} Opt:{self.selected_option}>'
 
+    @classmethod
+    def insert_for_attempt(cls, score, answer_key, selected):
+        """Store the graded selection masks of one attempt, in answer key order, in one executemany"""
+        from app.utils.grading import mask_answer
+        if not len(answer_key):
+            return
+        now = to_ist()
+        db.session.execute(cls.__table__.insert(), [
+            {'user_id': score.user_id, 'quiz_id': score.quiz_id, 'score_id': score.id,
+             'question_id': question_id, 'selected_option': str(mask_answer(mask)), 'attempt_timestamp': now}
+            for question_id, mask in zip(answer_key.question_ids, selected)
+        ])
+
+    @classmethod
+    def attempt_details(cls, score):
+        """
+        Load an attempt's answers with their questions in one join and mark
+        each correct or not, comparing option masks so '1,3' equals '3,1'.
+        Attempts stored as a packed sheet are decoded instead.
+        """
+        from app.models.quiz import Question
+        from app.utils.grading import option_mask, mask_answer
+        if score.packed_answers is not None:
+            return cls._packed_details(score)
+        rows = db.session.query(
+            cls.selected_option, Question.question_statement, Question.option1, Question.option2,
+            Question.option3, Question.option4, Question.correct_answer
+        ).join(Question, Question.id == cls.question_id) \
+            .filter(cls.score_id == score.id).order_by(cls.question_id).all()
+        selected = [option_mask(row.selected_option) for row in rows]
+        correct = [option_mask(row.correct_answer) for row in rows]
+        return [{
+            'question_statement': row.question_statement,
+            'options': [row.option1, row.option2, row.option3, row.option4],
+            'correct_answer': row.correct_answer,
+            'selected_answer': mask_answer(sel),
+            'is_correct': bool(sel) and sel == corr
+        } for row, sel, corr in zip(rows, selected, correct)]
+
+    @staticmethod
+    def _packed_details(score):
+        """attempt_details for a packed sheet: its masks against one query of the quiz's questions"""
+        from app.models.quiz import Question
+        from app.utils.grading import option_mask, mask_answer, unpack_masks
+        question_ids = AnswerMap.question_ids_of(score.answer_map_id)
+        selected = unpack_masks(score.packed_answers, len(question_ids))
+        questions = {row.id: row for row in db.session.query(
+            Question.id, Question.question_statement, Question.option1, Question.option2,
+            Question.option3, Question.option4, Question.correct_answer
+        ).filter(Question.quiz_id == score.quiz_id)}
+        details = []
+        for question_id, sel in zip(question_ids, selected):
+            row = questions.get(question_id)
+            if row is None:
+                continue  # the question was deleted after the attempt
+            correct = option_mask(row.correct_answer)
+            details.append({
+                'question_statement': row.question_statement,
+                'options': [row.option1, row.option2, row.option3, row.option4],
+                'correct_answer': row.correct_answer,
+                'selected_answer': mask_answer(sel),
+                'is_correct': bool(sel) and sel == correct
+            })
+        return details
+
     def as_dict(self):
         return {c.key: getattr(self, c.key) for c in self.__table__.columns}
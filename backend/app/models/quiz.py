@@ -1,5 +1,7 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.orm import column_property
 from app.utils.helpers import to_ist
 
 class Quiz(db.Model):
@@ -8,13 +10,16 @@ class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    chapter_id = db.Column(db.Integer, db.ForeignKey('chapters.id'), nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapters.id'), nullable=False, index=True)
     creator_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     duration = db.Column(db.Integer, nullable=False)  # Duration in minutes
     date_of_quiz = db.Column(db.DateTime, default=lambda: to_ist())
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=lambda: to_ist())
     
+    # Active quizzes, newest first (user quiz list)
+    __table_args__ = (db.Index('ix_quizzes_is_active_date_of_quiz', 'is_active', 'date_of_quiz'),)
+    
     # Relationships
     questions = db.relationship('Question', backref='quiz', lazy=True, cascade='all, delete-orphan')
     scores = db.relationship('Score', backref='quiz', lazy=True, cascade='all, delete-orphan')
@@ -31,7 +36,7 @@ class Quiz(db.Model):
             'date_of_quiz': self.date_of_quiz.isoformat() if self.date_of_quiz else None,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'questions_count': len(self.questions),
+            'questions_count': self.questions_count,
             'creator_id': self.creator_id
         }
     
@@ -42,7 +47,7 @@ class Question(db.Model):
     __tablename__ = 'questions'
     
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False, index=True)
     question_statement = db.Column(db.Text, nullable=False)
     option1 = db.Column(db.String(500), nullable=False)
     option2 = db.Column(db.String(500), nullable=False)
@@ -82,3 +87,8 @@ class Question(db.Model):
     
     def __repr__(self):
         return f'<Question {self.id}>'
+
+# Counted in SQL so serializing a quiz never loads its questions
+Quiz.questions_count = column_property(
+    select(func.count(Question.id)).where(Question.quiz_id == Quiz.id).correlate_except(Question).scalar_subquery()
+)
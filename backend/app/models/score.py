@@ -1,5 +1,7 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import func, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from app.utils.helpers import to_ist
 
 class Score(db.Model):
@@ -7,24 +9,63 @@ class Score(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
-    total_scored = db.Column(db.Integer, nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False, index=True)
+    total_scored = db.Column(db.Float, nullable=False)  # Marks scored, after negative marking
     total_questions = db.Column(db.Integer, nullable=False)
+    max_score = db.Column(db.Float)  # Marks available; NULL for attempts graded one mark per question
+    correct_answers = db.Column(db.Integer)
     time_taken = db.Column(db.Integer)  # Time taken in seconds
-    timestamp_of_attempt = db.Column(db.DateTime, default=lambda: to_ist())
+    timestamp_of_attempt = db.Column(db.DateTime, default=lambda: to_ist(), index=True)
+    # Packed answer sheet (ANSWER_STORAGE = 'packed'): one 4-bit option mask per
+    # question, two per byte, in the question order of the answer map
+    answer_map_id = db.Column(db.Integer, db.ForeignKey('answer_maps.id'))
+    packed_answers = db.Column(db.LargeBinary)
+    
+    # A user's attempts, newest first: score lists, dashboards, reminders, exports
+    __table_args__ = (db.Index('ix_scores_user_id_timestamp_of_attempt', 'user_id', 'timestamp_of_attempt'),)
     
     # NOTE: The 'answers' JSON field has been removed.
-    # Individual answers are now stored in the UserAnswer model.
+    # Individual answers are now stored in the UserAnswer model, or packed below.
+    
+    def pack_answers(self, answer_key, selected):
+        """Store the attempt's selection masks (in answer key order) as a packed sheet"""
+        from app.models.answer import AnswerMap
+        from app.utils.grading import pack_masks
+        self.answer_map_id = AnswerMap.id_for(self.quiz_id, answer_key.question_ids)
+        self.packed_answers = pack_masks(selected)
     
-    def to_dict(self):
+    @property
+    def total_marks(self):
+        return self.max_score if self.max_score is not None else self.total_questions
+
+    @property
+    def correct_count(self):
+        return self.correct_answers if self.correct_answers is not None else int(self.total_scored)
+
+    @hybrid_property
+    def percentage(self):
+        total = self.total_marks
+        return (self.total_scored / total) * 100 if total else 0
+
+    @percentage.expression
+    def percentage(cls):
+        total = func.coalesce(cls.max_score, cls.total_questions)
+        return case((total > 0, cls.total_scored * 100.0 / total), else_=0.0)
+
+    def to_dict(self, quiz_title=None):
+        """Serialize the attempt; pass quiz_title when it was already loaded with a join"""
+        if quiz_title is None and self.quiz:
+            quiz_title = self.quiz.title
         return {
             'id': self.id,
             'user_id': self.user_id,
             'quiz_id': self.quiz_id,
-            'quiz_title': self.quiz.title if self.quiz else None,
+            'quiz_title': quiz_title,
             'total_scored': self.total_scored,
             'total_questions': self.total_questions,
-            'percentage': round((self.total_scored / self.total_questions) * 100, 2) if self.total_questions > 0 else 0,
+            'max_score': self.total_marks,
+            'correct_answers': self.correct_count,
+            'percentage': round(self.percentage, 2),
             'time_taken': self.time_taken,
             'timestamp_of_attempt': self.timestamp_of_attempt.isoformat() if self.timestamp_of_attempt else None
         }
@@ -1,6 +1,9 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.orm import column_property
 from app.utils.helpers import to_ist
+from app.models.quiz import Quiz
 
 class Subject(db.Model):
     __tablename__ = 'subjects'
@@ -14,16 +17,13 @@ class Subject(db.Model):
     chapters = db.relationship('Chapter', backref='subject', lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
-        # Calculate total quizzes across all chapters of this subject
-        quiz_count = sum(len(chapter.quizzes) for chapter in self.chapters)
-        
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'chapters_count': len(self.chapters),
-            'quiz_count': quiz_count
+            'chapters_count': self.chapters_count,
+            'quiz_count': self.quizzes_count
         }
     
     def __repr__(self):
@@ -49,8 +49,20 @@ class Chapter(db.Model):
             'subject_id': self.subject_id,
             'subject_name': self.subject.name if self.subject else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'quizzes_count': len(self.quizzes)
+            'quizzes_count': self.quizzes_count
         }
     
     def __repr__(self):
         return f'<Chapter {self.name}>'
+
+# Counted in SQL so serializing a subject or chapter never walks its children
+Chapter.quizzes_count = column_property(
+    select(func.count(Quiz.id)).where(Quiz.chapter_id == Chapter.id).correlate_except(Quiz).scalar_subquery()
+)
+Subject.chapters_count = column_property(
+    select(func.count(Chapter.id)).where(Chapter.subject_id == Subject.id).correlate_except(Chapter).scalar_subquery()
+)
+Subject.quizzes_count = column_property(
+    select(func.count(Quiz.id)).join(Chapter, Quiz.chapter_id == Chapter.id)
+    .where(Chapter.subject_id == Subject.id).correlate_except(Quiz, Chapter).scalar_subquery()
+)
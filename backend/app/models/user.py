@@ -1,7 +1,7 @@
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 from app.utils.helpers import to_ist
+from app.utils.passwords import get_hasher
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -15,15 +15,21 @@ class User(db.Model):
     dob = db.Column(db.Date, nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: to_ist())
     last_login = db.Column(db.DateTime)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # bumped to revoke issued tokens
     
     # Relationships
     scores = db.relationship('Score', backref='user', lazy=True, cascade='all, delete-orphan')
     
+    # Both run on the password hashing pool and may raise HashingQueueFull
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_hasher().hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return get_hasher().verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Whether the hash predates the configured algorithm or cost"""
+        return get_hasher().needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
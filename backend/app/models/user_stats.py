@@ -0,0 +1,123 @@
+from app import db
+from sqlalchemy import func
+from app.models.score import Score
+from app.models.quiz import Quiz
+
+# Number of attempts kept for the dashboard performance graph
+RECENT_ATTEMPTS_LIMIT = 10
+
+class UserStats(db.Model):
+    """Per-user attempt summary, maintained incrementally by submit_quiz"""
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    attempts_count = db.Column(db.Integer, nullable=False, default=0)
+    questions_answered = db.Column(db.Integer, nullable=False, default=0)
+    percentage_sum = db.Column(db.Float, nullable=False, default=0.0)
+    best_percentage = db.Column(db.Float, nullable=False, default=0.0)
+    last_attempt_at = db.Column(db.DateTime)
+    recent_attempts = db.Column(db.JSON)  # [[quiz title, percentage], ...], oldest first
+
+    user = db.relationship('User', backref=db.backref('stats', uselist=False, cascade='all, delete-orphan'))
+
+    @classmethod
+    def lock_for_user(cls, user_id):
+        """Return the user's row, creating it if needed, locked for update"""
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            db.session.execute(insert(cls.__table__).values(
+                user_id=user_id, attempts_count=0, questions_answered=0,
+                percentage_sum=0.0, best_percentage=0.0, recent_attempts=[]
+            ).on_conflict_do_nothing(index_elements=['user_id']))
+        elif db.session.get(cls, user_id) is None:
+            db.session.add(cls(user_id=user_id, attempts_count=0, questions_answered=0,
+                               percentage_sum=0.0, best_percentage=0.0, recent_attempts=[]))
+            db.session.flush()
+        return cls.query.filter_by(user_id=user_id).with_for_update().populate_existing().one()
+
+    @classmethod
+    def record_attempt(cls, score, quiz_title):
+        """Fold a newly added Score into its user's row, in the caller's transaction"""
+        stats = cls.lock_for_user(score.user_id)
+        percentage = round(score.percentage, 2)
+        stats.attempts_count += 1
+        stats.questions_answered += score.total_questions or 0
+        stats.percentage_sum += percentage
+        stats.best_percentage = max(stats.best_percentage, percentage)
+        stats.last_attempt_at = score.timestamp_of_attempt
+        recent = list(stats.recent_attempts or []) + [[quiz_title, percentage]]
+        stats.recent_attempts = recent[-RECENT_ATTEMPTS_LIMIT:]
+        return stats
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """
+        Recompute rows from the scores table, for all users or just user_ids.
+        Every requested user gets a row, even with no attempts. Does not commit.
+        """
+        from app.models.user import User
+        users = db.session.query(User.id)
+        if user_ids is not None:
+            users = users.filter(User.id.in_(user_ids))
+        ids = [user_id for (user_id,) in users]
+
+        aggregates = db.session.query(
+            Score.user_id,
+            func.count(Score.id),
+            func.coalesce(func.sum(Score.total_questions), 0),
+            func.coalesce(func.sum(Score.percentage), 0.0),
+            func.coalesce(func.max(Score.percentage), 0.0),
+            func.max(Score.timestamp_of_attempt)
+        ).group_by(Score.user_id)
+        position = func.row_number().over(
+            partition_by=Score.user_id,
+            order_by=(Score.timestamp_of_attempt.desc(), Score.id.desc())
+        ).label('position')
+        recent = db.session.query(
+            Score.user_id, Quiz.title, Score.percentage.label('percentage'), position
+        ).outerjoin(Quiz, Quiz.id == Score.quiz_id).subquery()
+        recent_rows = db.session.query(recent.c.user_id, recent.c.title, recent.c.percentage) \
+            .filter(recent.c.position <= RECENT_ATTEMPTS_LIMIT) \
+            .order_by(recent.c.user_id, recent.c.position.desc())
+        if user_ids is not None:
+            aggregates = aggregates.filter(Score.user_id.in_(ids))
+            recent_rows = recent_rows.filter(recent.c.user_id.in_(ids))
+
+        rows = {user_id: {
+            'user_id': user_id, 'attempts_count': 0, 'questions_answered': 0,
+            'percentage_sum': 0.0, 'best_percentage': 0.0, 'last_attempt_at': None,
+            'recent_attempts': []
+        } for user_id in ids}
+        for user_id, count, questions, percentage_sum, best, last in aggregates:
+            if user_id in rows:
+                rows[user_id].update({
+                    'attempts_count': count, 'questions_answered': questions,
+                    'percentage_sum': percentage_sum, 'best_percentage': round(best, 2),
+                    'last_attempt_at': last
+                })
+        for user_id, title, percentage in recent_rows:
+            if user_id in rows:
+                rows[user_id]['recent_attempts'].append([title or 'Unknown Quiz', round(percentage, 2)])
+
+        query = cls.query
+        if user_ids is not None:
+            query = query.filter(cls.user_id.in_(ids))
+        query.delete(synchronize_session=False)
+        if rows:
+            db.session.execute(cls.__table__.insert(), list(rows.values()))
+        return len(rows)
+
+    def to_dict(self):
+        return {
+            'quizzes_taken': self.attempts_count,
+            'average_score': round(self.percentage_sum / self.attempts_count, 1) if self.attempts_count else 0,
+            'best_score': round(self.best_percentage, 1),
+            'total_questions_answered': self.questions_answered
+        }
+
+    def __repr__(self):
+        return f'<UserStats {self.user_id}: {self.attempts_count} attempts>'
@@ -1,25 +1,30 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, send_from_directory, current_app, stream_with_context
+from flask_jwt_extended import get_jwt_identity
 from app import db, cache
 from app.models.user import User
 from app.models.subject import Subject, Chapter
 from app.models.quiz import Quiz, Question
 from app.models.score import Score
-from functools import wraps
+from app.models.answer import UserAnswer
+from app.models.user_stats import UserStats
+from app.utils.helpers import admin_required, revoke_user_tokens, encode_cursor, decode_cursor, to_ist
+from app.utils.quiz_cache import bump_quiz_version
+from app.utils.charts import CHART_CACHE_TIMEOUT, chart_data_version, invalidate_chart_data
+from app.utils.exports import USER_PERFORMANCE_HEADER, user_performance_rows, stream_csv, export_dir, load_export_token
+from app.utils.passwords import get_hasher
+from app.utils.leaderboards import remove_user, refresh_leaderboards
+from app.utils.search import KINDS, search, search_terms, load_results
+from sqlalchemy import func, case, or_, tuple_
+from sqlalchemy.orm import contains_eager
 from datetime import datetime, timedelta
+import csv
+import io
+import json
 
 admin_bp = Blueprint('admin', __name__)
 
-def admin_required(f):
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user or user.role != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
-        return f(*args, **kwargs)
-    return decorated_function
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_ERRORS = 100
 
 # Delete user
 @admin_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -31,6 +36,8 @@ def delete_user(user_id):
             return jsonify({'error': 'Cannot delete admin user'}), 403
         db.session.delete(user)
         db.session.commit()
+        revoke_user_tokens(user_id)
+        remove_user(user_id)
         return jsonify({'message': 'User deleted'}), 200
     except Exception as e:
         db.session.rollback()
@@ -45,13 +52,16 @@ def delete_user_and_data(user_id):
         # Only block deletion for hardcoded admin user
         if user.email == 'admin@quizmaster.com' and user.role == 'admin':
             return jsonify({'error': 'You cannot delete Administration data.'}), 403
-        # Delete all scores
+        # Delete all answers and scores
+        UserAnswer.query.filter_by(user_id=user_id).delete()
         Score.query.filter_by(user_id=user_id).delete()
         # Delete all quiz attempts (if you have a QuizAttempt model, add here)
         # Delete all quizzes created by user (if needed)
         # Delete user
         db.session.delete(user)
         db.session.commit()
+        revoke_user_tokens(user_id)
+        remove_user(user_id)
         return jsonify({'message': 'User and all related data deleted'}), 200
     except Exception as e:
         db.session.rollback()
@@ -70,12 +80,38 @@ def update_user_role(user_id):
         # Prevent changing hardcoded admin role
         if user.email == 'admin@quizmaster.com' and user.role == 'admin':
             return jsonify({'error': 'You cannot change the role of the Administration user.'}), 403
-        user.role = role
-        db.session.commit()
+        if user.role != role:
+            # Tokens carry the role claim, so the old ones must go
+            user.role = role
+            user.token_version = (user.token_version or 0) + 1
+            db.session.commit()
+            revoke_user_tokens(user.id, user.token_version)
         return jsonify({'message': 'Role updated', 'user': user.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+# Export user performance data
+@admin_bp.route('/users/export', methods=['GET'])
+@admin_required
+def export_users():
+    """
+    Stream the user performance export as CSV while it is read from the database.
+    Nothing is written to disk; the emailed export (export_admin_user_data) writes the files.
+    """
+    filename = f"user_performance_data_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
+    return current_app.response_class(
+        stream_with_context(stream_csv(USER_PERFORMANCE_HEADER, user_performance_rows())),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+# Download an export file through a signed link (no login needed)
+@admin_bp.route('/exports/<path:filename>', methods=['GET'])
+def download_export(filename):
+    if load_export_token(request.args.get('token', '')) != filename:
+        return jsonify({'error': 'Invalid or expired download link'}), 403
+    return send_from_directory(export_dir(), filename, mimetype='application/gzip', as_attachment=True)
+
 # User count endpoint
 @admin_bp.route('/users/count', methods=['GET'])
 @admin_required
@@ -86,6 +122,12 @@ def get_user_count():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/metrics/password-hashing', methods=['GET'])
+@admin_required
+def password_hashing_metrics():
+    """Queue depth and counters of this worker process's password hashing pool"""
+    return jsonify(get_hasher().stats()), 200
+
 # --- DASHBOARD ENDPOINTS ---
 
 @admin_bp.route('/dashboard/stats', methods=['GET'])
@@ -107,23 +149,126 @@ def get_dashboard_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+CHART_BUCKETS = {
+    # bucket: (step, label format, SQLite strftime, PostgreSQL date_trunc unit)
+    'hour': (timedelta(hours=1), '%b %d %H:00', '%Y-%m-%d %H:00:00', 'hour'),
+    'day': (timedelta(days=1), '%b %d', '%Y-%m-%d', 'day'),
+    'week': (timedelta(weeks=1), 'Week of %b %d', '%Y-%m-%d', 'week')
+}
+def users_with_scores(*criteria):
+    """Ids of users with scores on the quizzes matching criteria (on Quiz and Chapter)"""
+    return [user_id for (user_id,) in db.session.query(Score.user_id).join(Quiz, Quiz.id == Score.quiz_id)
+            .join(Chapter, Chapter.id == Quiz.chapter_id).filter(*criteria).distinct()]
+
+def _chart_bucket_floor(moment, bucket):
+    if bucket == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+def _chart_bucket_expression(bucket):
+    """SQL expression turning a timestamp into its bucket's start, as a string"""
+    _, _, sqlite_format, pg_unit = CHART_BUCKETS[bucket]
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        pg_format = 'YYYY-MM-DD HH24:00:00' if bucket == 'hour' else 'YYYY-MM-DD'
+        return func.to_char(func.date_trunc(pg_unit, Score.timestamp_of_attempt), pg_format)
+    if bucket == 'week':
+        # Move to the coming Sunday, then back to that week's Monday
+        return func.date(Score.timestamp_of_attempt, 'weekday 0', '-6 days')
+    return func.strftime(sqlite_format, Score.timestamp_of_attempt)
+
 @admin_bp.route('/dashboard/chart-data', methods=['GET'])
 @admin_required
 def get_chart_data():
+    """
+    Attempts histogram for the last ``days`` days (default 7), bucketed by
+    ``bucket`` ('hour', 'day' or 'week'). Counts come from one range-bounded
+    GROUP BY and empty buckets are filled in here. Results are cached briefly
+    and expired when a new Score is written.
+    """
     try:
+        days = request.args.get('days', 7, type=int)
+        bucket = request.args.get('bucket', 'day')
+        if bucket not in CHART_BUCKETS:
+            return jsonify({'error': 'bucket must be hour, day or week'}), 400
+        if not days or days < 1 or days > 366:
+            return jsonify({'error': 'days must be between 1 and 366'}), 400
+
+        cache_key = f"admin_chart_data:{days}:{bucket}:{chart_data_version()}"
+        chart_data = cache.get(cache_key)
+        if chart_data:
+            return jsonify(chart_data), 200
+
+        step, label_format, sqlite_format, _ = CHART_BUCKETS[bucket]
+        # Attempts are stored in IST, so the window is computed in IST too
+        now = to_ist().replace(tzinfo=None)
+        if bucket == 'hour':
+            start = _chart_bucket_floor(now, bucket) - timedelta(hours=days * 24 - 1)
+        else:
+            start = _chart_bucket_floor(now - timedelta(days=days - 1), bucket)
+
+        bucket_start = _chart_bucket_expression(bucket).label('bucket_start')
+        counts = dict(
+            db.session.query(bucket_start, func.count(Score.id))
+            .filter(Score.timestamp_of_attempt >= start)
+            .group_by(bucket_start)
+            .all()
+        )
+
         labels = []
         attempts = []
-        today = datetime.utcnow().date()
-        for i in range(6, -1, -1):
-            day = today - timedelta(days=i)
-            labels.append(day.strftime('%b %d'))
-            sample_attempts = Score.query.filter(db.func.date(Score.timestamp_of_attempt) == day).count()
-            attempts.append(sample_attempts)
-        chart_data = {'labels': labels, 'attempts': attempts}
+        current = start
+        while current <= now:
+            labels.append(current.strftime(label_format))
+            attempts.append(counts.get(current.strftime(sqlite_format), 0))
+            current += step
+        chart_data = {'labels': labels, 'attempts': attempts, 'days': days, 'bucket': bucket}
+        cache.set(cache_key, chart_data, timeout=CHART_CACHE_TIMEOUT)
         return jsonify(chart_data), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# --- SEARCH ---
+
+@admin_bp.route('/search', methods=['GET'])
+@admin_required
+def search_content():
+    """
+    Full-text search over questions (statement and options), quizzes
+    (title and description) and chapters (name and description).
+
+    Every word of ``q`` must match the start of a word, best matches first.
+    ``type`` (question, quiz or chapter; repeatable) narrows the kinds. The
+    response carries a ``next_cursor`` which is sent back as ``cursor`` for
+    the next page of ``limit`` results.
+    """
+    try:
+        q = request.args.get('q', '')
+        if not search_terms(q):
+            return jsonify({'error': 'Search query is required'}), 400
+        kinds = request.args.getlist('type')
+        if any(kind not in KINDS for kind in kinds):
+            return jsonify({'error': f"Invalid type, expected one of: {', '.join(KINDS)}"}), 400
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        after = None
+        if request.args.get('cursor'):
+            try:
+                last_rank, last_key = decode_cursor(request.args['cursor'])
+                after = (float(last_rank), int(last_key))
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+        matches = search(q, kinds, limit, after)
+        has_more = len(matches) == limit
+        return jsonify({
+            'results': load_results(matches),
+            'next_cursor': encode_cursor(matches[-1][2], matches[-1][3]) if has_more else None
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # --- SUBJECT MANAGEMENT ---
 
 @admin_bp.route('/subjects', methods=['GET'])
@@ -167,6 +312,9 @@ def update_subject(subject_id):
         if 'description' in data:
             subject.description = data['description']
         db.session.commit()
+        # Cached quiz papers embed the subject name
+        for (quiz_id,) in db.session.query(Quiz.id).join(Chapter).filter(Chapter.subject_id == subject_id):
+            bump_quiz_version(quiz_id)
         return jsonify({'message': 'Subject updated successfully', 'subject': subject.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -177,9 +325,15 @@ def update_subject(subject_id):
 def delete_subject(subject_id):
     try:
         subject = Subject.query.get_or_404(subject_id)
+        user_ids = users_with_scores(Chapter.subject_id == subject_id)
+        quiz_ids = [id for (id,) in db.session.query(Quiz.id).join(Chapter).filter(Chapter.subject_id == subject_id)]
         db.session.delete(subject)
+        db.session.flush()
+        UserStats.rebuild(user_ids)  # their summaries still count the deleted scores
         db.session.commit()
         cache.delete('admin_dashboard_stats')
+        invalidate_chart_data()
+        refresh_leaderboards([subject_id], quiz_ids)
         return jsonify({'message': 'Subject deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -191,13 +345,8 @@ def delete_subject(subject_id):
 @admin_required
 def get_chapters():
     try:
-        chapters = db.session.query(Chapter, Subject.name.label('subject_name')) \
-            .join(Subject, Chapter.subject_id == Subject.id).all()
-        chapter_list = []
-        for chapter, subject_name in chapters:
-            chap_dict = chapter.to_dict()
-            chap_dict['subject_name'] = subject_name
-            chapter_list.append(chap_dict)
+        chapters = Chapter.query.join(Chapter.subject).options(contains_eager(Chapter.subject)).all()
+        chapter_list = [chapter.to_dict() for chapter in chapters]
         return jsonify(chapter_list), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -230,9 +379,15 @@ def update_chapter(chapter_id):
             chapter.name = data['name']
         if 'description' in data:
             chapter.description = data['description']
+        old_subject_id = chapter.subject_id
         if data.get('subject_id'):
             chapter.subject_id = data['subject_id']
         db.session.commit()
+        # Cached quiz papers embed the chapter and subject names
+        for (quiz_id,) in db.session.query(Quiz.id).filter_by(chapter_id=chapter_id):
+            bump_quiz_version(quiz_id)
+        if chapter.subject_id != old_subject_id:
+            refresh_leaderboards([old_subject_id, chapter.subject_id])  # its quizzes count for another subject
         return jsonify({'message': 'Chapter updated successfully', 'chapter': chapter.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -243,8 +398,16 @@ def update_chapter(chapter_id):
 def delete_chapter(chapter_id):
     try:
         chapter = Chapter.query.get_or_404(chapter_id)
+        user_ids = users_with_scores(Quiz.chapter_id == chapter_id)
+        subject_id = chapter.subject_id
+        quiz_ids = [id for (id,) in db.session.query(Quiz.id).filter_by(chapter_id=chapter_id)]
         db.session.delete(chapter)
+        db.session.flush()
+        UserStats.rebuild(user_ids)
         db.session.commit()
+        cache.delete('admin_dashboard_stats')
+        invalidate_chart_data()
+        refresh_leaderboards([subject_id], quiz_ids)
         return jsonify({'message': 'Chapter deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -256,15 +419,12 @@ def delete_chapter(chapter_id):
 @admin_required
 def get_quizzes():
     try:
-        quizzes = db.session.query(Quiz, Chapter.name.label('chapter_name'), Subject.name.label('subject_name'))\
-            .join(Chapter, Quiz.chapter_id == Chapter.id)\
-            .join(Subject, Chapter.subject_id == Subject.id).all()
+        quizzes = Quiz.query.join(Quiz.chapter).join(Chapter.subject)\
+            .options(contains_eager(Quiz.chapter).contains_eager(Chapter.subject)).all()
         quiz_list = []
-        for quiz, chapter_name, subject_name in quizzes:
+        for quiz in quizzes:
             quiz_dict = quiz.to_dict()
-            quiz_dict['chapter_name'] = chapter_name
-            quiz_dict['subject_name'] = subject_name
-            quiz_dict['question_count'] = Question.query.filter_by(quiz_id=quiz.id).count()
+            quiz_dict['question_count'] = quiz.questions_count
             quiz_list.append(quiz_dict)
         return jsonify(quiz_list), 200
     except Exception as e:
@@ -305,6 +465,7 @@ def update_quiz(quiz_id):
     try:
         quiz = Quiz.query.get_or_404(quiz_id)
         data = request.get_json()
+        old_subject_id = quiz.chapter.subject_id
         
         quiz.chapter_id = data.get('chapter_id', quiz.chapter_id)
         quiz.date_of_quiz = datetime.strptime(data.get('date_of_quiz'), '%Y-%m-%d') if data.get('date_of_quiz') else quiz.date_of_quiz
@@ -312,6 +473,9 @@ def update_quiz(quiz_id):
         quiz.title = data.get('title', quiz.title)
             
         db.session.commit()
+        bump_quiz_version(quiz_id)
+        if quiz.chapter.subject_id != old_subject_id:
+            refresh_leaderboards([old_subject_id, quiz.chapter.subject_id])  # it counts for another subject now
         return jsonify({'message': 'Quiz updated successfully', 'quiz': quiz.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -322,51 +486,186 @@ def update_quiz(quiz_id):
 def delete_quiz(quiz_id):
     try:
         quiz = Quiz.query.get_or_404(quiz_id)
+        user_ids = users_with_scores(Quiz.id == quiz_id)
+        subject_id = quiz.chapter.subject_id
         Question.query.filter_by(quiz_id=quiz_id).delete()
         db.session.delete(quiz)
+        db.session.flush()
+        UserStats.rebuild(user_ids)
         db.session.commit()
+        bump_quiz_version(quiz_id)
         cache.delete('admin_dashboard_stats')
+        invalidate_chart_data()
+        refresh_leaderboards([subject_id], [quiz_id])  # drops its board and its share of the subject's
         return jsonify({'message': 'Quiz deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _question_fields(quiz_id, data):
+    """
+    Map an add-question payload to Question column values.
+    Options are four strings; 'correct' (single) or 'correctMultiple'
+    (multiple) hold 0-based option indexes. Raises ValueError if invalid.
+    """
+    options = data.get('options', [])
+    if len(options) != 4:
+        raise ValueError('Exactly 4 options are required.')
+    if any(not option for option in options):
+        raise ValueError('Options cannot be empty.')
+    if not data.get('text'):
+        raise ValueError('Question text is required.')
+    type_ = data.get('type') or 'single'
+    if type_ not in ('single', 'multiple'):
+        raise ValueError("Type must be 'single' or 'multiple'.")
+    if type_ == 'multiple':
+        indexes = sorted({int(i) for i in data.get('correctMultiple', [])})
+    else:
+        indexes = [int(data.get('correct') or 0)]
+    if not indexes or any(i < 0 or i > 3 for i in indexes):
+        raise ValueError('Correct answer must reference options 0-3.')
+    return {
+        'quiz_id': quiz_id,
+        'question_statement': data['text'],
+        'option1': options[0],
+        'option2': options[1],
+        'option3': options[2],
+        'option4': options[3],
+        'correct_answer': ','.join(str(i + 1) for i in indexes),
+        'marks': int(data.get('marks', 1)),
+        'negative_marks': int(data.get('negative_marks', 0)),
+        'type': type_
+    }
+
 @admin_bp.route('/quizzes/<int:quiz_id>/questions', methods=['POST'])
 @admin_required
 def add_question(quiz_id):
     try:
         data = request.get_json()
-        options = data.get('options', [])
-        if len(options) != 4:
-            return jsonify({'error': 'Exactly 4 options are required.'}), 400
-        type_ = data.get('type', 'single')
-        marks = data.get('marks', 1)
-        negative_marks = data.get('negative_marks', 0)
-        correct = data.get('correct', 0)
-        correctMultiple = data.get('correctMultiple', [])
-        if type_ == 'multiple':
-            correct_answer = ','.join(str(i+1) for i in correctMultiple)
-        else:
-            correct_answer = str(correct + 1)
-        question = Question(
-            quiz_id=quiz_id,
-            question_statement=data.get('text'),
-            option1=options[0],
-            option2=options[1],
-            option3=options[2],
-            option4=options[3],
-            correct_answer=correct_answer,
-            marks=marks,
-            negative_marks=negative_marks,
-            type=type_
-        )
+        try:
+            question = Question(**_question_fields(quiz_id, data))
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
         db.session.add(question)
         db.session.commit()
+        bump_quiz_version(quiz_id)
         return jsonify({'message': 'Question added', 'question': question.to_dict()}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _read_csv_questions(stream):
+    """
+    Yield (row_number, payload, error) from a CSV upload with the columns
+    text, option1-option4, type, correct, correct_multiple (indexes separated
+    by ';'), marks and negative_marks. Payloads use the add-question shape.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row_number, row in enumerate(reader, start=1):
+        multiple = (row.get('correct_multiple') or '').replace(',', ';')
+        payload = {
+            'text': row.get('text'),
+            'options': [row.get(f'option{i}') for i in range(1, 5)],
+            'type': (row.get('type') or 'single').strip().lower(),
+            'correct': row.get('correct') or 0,
+            'correctMultiple': [i for i in multiple.split(';') if i.strip()]
+        }
+        for field in ('marks', 'negative_marks'):
+            if row.get(field):
+                payload[field] = row[field]
+        yield row_number, payload, None
+
+def _read_jsonl_questions(stream):
+    """Yield (row_number, payload, error) from a JSONL upload, one add-question payload per line"""
+    for row_number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line), None
+        except ValueError as e:
+            yield row_number, None, f'Invalid JSON: {e}'
+
+@admin_bp.route('/quizzes/<int:quiz_id>/questions/import', methods=['POST'])
+@admin_required
+def import_questions(quiz_id):
+    """
+    Bulk-load questions from a CSV or JSONL upload (multipart field 'file').
+
+    Rows are parsed and validated one at a time and inserted in batches of
+    IMPORT_BATCH_SIZE, each in its own transaction, so memory stays flat for
+    large files. Invalid rows are skipped and reported without aborting the
+    import; only the first IMPORT_MAX_ERRORS errors are returned.
+    """
+    try:
+        if not db.session.get(Quiz, quiz_id):
+            return jsonify({'error': 'Quiz not found'}), 404
+        upload = request.files.get('file')
+        if not upload:
+            return jsonify({'error': 'A CSV or JSONL file is required'}), 400
+        fmt = request.form.get('format') or request.args.get('format') \
+            or (upload.filename or '').rsplit('.', 1)[-1].lower()
+        if fmt == 'csv':
+            rows = _read_csv_questions(upload.stream)
+        elif fmt in ('jsonl', 'ndjson'):
+            rows = _read_jsonl_questions(upload.stream)
+        else:
+            return jsonify({'error': 'Unsupported format, expected csv or jsonl'}), 400
+
+        imported = 0
+        failed = 0
+        errors = []
+        batch = []
+        batch_rows = []
+
+        def report(row_number, message):
+            nonlocal failed
+            failed += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({'row': row_number, 'error': message})
+
+        def flush():
+            nonlocal imported
+            try:
+                db.session.execute(Question.__table__.insert(), batch)
+                db.session.commit()
+                imported += len(batch)
+            except Exception as e:
+                db.session.rollback()
+                for row_number in batch_rows:
+                    report(row_number, f'Batch insert failed: {e}')
+            batch.clear()
+            batch_rows.clear()
+
+        try:
+            for row_number, payload, error in rows:
+                if error is None:
+                    try:
+                        batch.append(_question_fields(quiz_id, payload))
+                        batch_rows.append(row_number)
+                    except (ValueError, TypeError, AttributeError) as e:
+                        error = str(e)
+                if error:
+                    report(row_number, error)
+                elif len(batch) >= IMPORT_BATCH_SIZE:
+                    flush()
+        except (csv.Error, UnicodeDecodeError) as e:
+            report(None, f'Could not parse file, import stopped: {e}')
+        if batch:
+            flush()
+
+        if imported:
+            bump_quiz_version(quiz_id)
+        return jsonify({
+            'message': f'Imported {imported} questions',
+            'imported': imported,
+            'failed': failed,
+            'errors': errors,
+            'errors_truncated': failed > len(errors)
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @admin_bp.route('/quizzes/<int:quiz_id>/questions', methods=['GET'])
 @admin_required
 def get_questions(quiz_id):
@@ -396,6 +695,7 @@ def update_question(question_id):
         else:
             question.correct_answer = str(data.get('correct', 0) + 1)
         db.session.commit()
+        bump_quiz_version(question.quiz_id)
         return jsonify({'message': 'Question updated', 'question': question.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -407,8 +707,10 @@ def update_question(question_id):
 def delete_question(question_id):
     try:
         question = Question.query.get_or_404(question_id)
+        quiz_id = question.quiz_id
         db.session.delete(question)
         db.session.commit()
+        bump_quiz_version(quiz_id)
         return jsonify({'message': 'Question deleted'}), 200
     except Exception as e:
         db.session.rollback()
@@ -419,27 +721,97 @@ def delete_question(question_id):
 @admin_bp.route('/users', methods=['GET'])
 @admin_required
 def get_users():
+    """
+    List users together with their attempt statistics.
+
+    The statistics come from one grouped query over ``scores`` joined to
+    ``users``. Passing ``limit`` switches to keyset pagination: the response
+    carries a ``next_cursor`` which is sent back as ``cursor`` for the next
+    page. ``sort``/``order`` pick the ordering and ``role``, ``name``,
+    ``email`` and ``q`` (name or email) filter the list.
+    """
     try:
-        users = User.query.all()
+        stats = db.session.query(
+            Score.user_id.label('user_id'),
+            func.count(Score.id).label('total_attempts'),
+            func.count(func.distinct(Score.quiz_id)).label('total_quizzes_attempted'),
+            func.sum(Score.total_scored).label('total_scored'),
+            func.sum(func.coalesce(Score.max_score, Score.total_questions)).label('max_score')
+        ).group_by(Score.user_id).subquery()
+
+        total_attempts = func.coalesce(stats.c.total_attempts, 0)
+        total_quizzes_attempted = func.coalesce(stats.c.total_quizzes_attempted, 0)
+        average_score = case(
+            (stats.c.max_score > 0, stats.c.total_scored * 100.0 / stats.c.max_score),
+            else_=0.0
+        )
+        sort_columns = {
+            'id': User.id,
+            'full_name': User.full_name,
+            'email': User.email,
+            'total_attempts': total_attempts,
+            'average_score': average_score,
+            'total_quizzes_attempted': total_quizzes_attempted
+        }
+
+        sort = request.args.get('sort', 'id')
+        if sort not in sort_columns:
+            return jsonify({'error': f"Invalid sort field: {sort}"}), 400
+        descending = request.args.get('order', 'asc').lower() == 'desc'
+        limit = request.args.get('limit', type=int)
+        if limit:
+            limit = max(1, min(limit, 500))
+        cursor = request.args.get('cursor')
+        sort_column = sort_columns[sort]
+
+        query = db.session.query(
+            User,
+            total_attempts.label('total_attempts'),
+            average_score.label('average_score'),
+            total_quizzes_attempted.label('total_quizzes_attempted'),
+            sort_column.label('sort_value')
+        ).outerjoin(stats, stats.c.user_id == User.id)
+
+        if request.args.get('role'):
+            query = query.filter(User.role == request.args['role'])
+        if request.args.get('name'):
+            query = query.filter(User.full_name.ilike(f"%{request.args['name']}%"))
+        if request.args.get('email'):
+            query = query.filter(User.email.ilike(f"%{request.args['email']}%"))
+        if request.args.get('q'):
+            term = f"%{request.args['q']}%"
+            query = query.filter(or_(User.full_name.ilike(term), User.email.ilike(term)))
+
+        if cursor:
+            try:
+                last_value, last_id = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            key = tuple_(sort_column, User.id)
+            query = query.filter(key < tuple_(last_value, last_id) if descending else key > tuple_(last_value, last_id))
+
+        if descending:
+            query = query.order_by(sort_column.desc(), User.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), User.id.asc())
+        if limit:
+            query = query.limit(limit)
+
+        rows = query.all()
         user_data = []
-        for user in users:
-            user_scores = Score.query.filter_by(user_id=user.id).all()
-            total_attempts = len(user_scores)
-            avg_score = 0
-            quizzes_attempted = set()
-            for score in user_scores:
-                quizzes_attempted.add(score.quiz_id)
-            if total_attempts > 0:
-                total_questions_sum = sum(score.total_questions for score in user_scores if score.total_questions)
-                if total_questions_sum > 0:
-                    avg_score = sum(score.total_scored for score in user_scores) / total_questions_sum * 100
+        for user, attempts, avg_score, quizzes_attempted, _ in rows:
             user_info = user.to_dict()
             user_info.update({
-                'total_attempts': total_attempts,
-                'average_score': round(avg_score, 2),
-                'total_quizzes_attempted': len(quizzes_attempted)
+                'total_attempts': attempts,
+                'average_score': round(avg_score or 0, 2),
+                'total_quizzes_attempted': quizzes_attempted
             })
             user_data.append(user_info)
-        return jsonify({ 'users': user_data }), 200
+
+        response = {'users': user_data}
+        if limit:
+            has_more = len(rows) == limit
+            response['next_cursor'] = encode_cursor(rows[-1].sort_value, rows[-1][0].id) if has_more else None
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
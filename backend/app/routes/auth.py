@@ -2,6 +2,10 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app import db
 from app.models.user import User
+from app.utils.helpers import token_claims, clear_user_revocation
+from app.utils.passwords import HashingQueueFull
+from app.utils.activity import record_login
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
@@ -15,9 +19,7 @@ def register():
             if not data.get(field):
                 return jsonify({'error': f'{field} is required'}), 400
         
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Email already exists'}), 400
-        
+        # The unique index on email rejects duplicates, even concurrent ones, in the insert itself
         user = User(
             email=data['email'],
             full_name=data['full_name'],
@@ -27,10 +29,19 @@ def register():
         )
         user.set_password(data['password'])
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'Email already exists'}), 400
+        # SQLite can hand out the id of a deleted account again
+        clear_user_revocation(user.id)
         
         return jsonify({'message': 'User registered successfully', 'user': user.to_dict()}), 201
         
+    except HashingQueueFull as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -47,10 +58,11 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
-        user.last_login = datetime.utcnow()
-        db.session.commit()
-        
-        access_token = create_access_token(identity=user.id)
+        # Upgrade the stored hash while the plain password is at hand
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        access_token = create_access_token(identity=user.id, additional_claims=token_claims(user))
         
         # --- FIX: Explicitly include the user's role in the response ---
         # This is critical for the frontend to know where to redirect.
@@ -61,12 +73,18 @@ def login():
             'role': user.role  # Ensure the role is always sent
         }
         
+        # Written in batches, at most once per LAST_LOGIN_FLUSH_INTERVAL seconds per user
+        record_login(user.id, datetime.utcnow())
+        
         return jsonify({
             'message': 'Login successful',
             'access_token': access_token,
             'user': user_data
         }), 200
         
+    except HashingQueueFull as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
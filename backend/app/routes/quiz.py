@@ -1,11 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.user import User
 from app.models.quiz import Quiz, Question
 from app.models.score import Score
 from app.models.answer import UserAnswer
+from app.models.user_stats import UserStats
+from app.models.subject import Chapter
+from app.utils.grading import grade_answers, get_answer_key, option_mask, mask_answer
+from app.utils.quiz_cache import get_paper
+from app.utils.quiz_sessions import start_session, save_answers, end_session, restore_session
+from app.utils.leaderboards import QUIZ_BOARD_KEY, leaderboard, record_score, invalidate_leaderboards
+from app.utils.charts import invalidate_chart_data
 from datetime import datetime, timezone # 1. Import timezone
+import json
 
 quiz_bp = Blueprint('quiz', __name__)
 
@@ -13,70 +21,103 @@ quiz_bp = Blueprint('quiz', __name__)
 @jwt_required()
 def start_quiz(quiz_id):
     try:
-        quiz = Quiz.query.get_or_404(quiz_id)
-        if not quiz.is_active:
-            return jsonify({'error': 'Quiz is not active'}), 400
-        
-        questions = Question.query.filter_by(quiz_id=quiz_id).all()
-        if not questions:
-            return jsonify({'error': 'Quiz has no questions'}), 400
-        
-        quiz_data = {
-            'quiz': quiz.to_dict(),
-            'questions': [q.to_dict_without_answer() for q in questions],
-            'start_time': datetime.now(timezone.utc).isoformat() # Use timezone-aware time
-        }
-        return jsonify(quiz_data), 200
+        user_id = get_jwt_identity()
+        # The paper is served pre-serialized; only the session is per request
+        paper = get_paper(quiz_id)
+        if paper is None:
+            return jsonify({'error': 'Quiz not found'}), 404
+        error, body, duration = paper
+        if error:
+            return jsonify({'error': error}), 400
+
+        session = start_session(user_id, quiz_id, duration, get_answer_key(quiz_id).question_ids)
+        body += b',' + json.dumps(session.to_dict())[1:].encode()
+        return current_app.response_class(body, status=200, mimetype='application/json')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@quiz_bp.route('/<int:quiz_id>/answers', methods=['PUT'])
+@jwt_required()
+def autosave_answers(quiz_id):
+    """Save answers of a running quiz ({question_id: answer}) to its session, without touching the database"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        positions = get_answer_key(quiz_id).positions
+        answers = {}
+        for question_id, answer in (data.get('answers') or {}).items():
+            if not str(question_id).isdigit() or int(question_id) not in positions:
+                return jsonify({'error': f'Question {question_id} is not part of this quiz'}), 400
+            answers[int(question_id)] = mask_answer(option_mask(answer))
+        try:
+            expires_at = save_answers(user_id, quiz_id, answers, data.get('session_id'))
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 409
+        return jsonify({'saved': len(answers), 'expires_at': datetime.fromtimestamp(expires_at, timezone.utc).isoformat()}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @quiz_bp.route('/<int:quiz_id>/submit', methods=['POST'])
 @jwt_required()
 def submit_quiz(quiz_id):
+    session = None
+    committed = False
     try:
         user_id = get_jwt_identity()
-        data = request.get_json()
-        answers = data.get('answers', {})
-        start_time_str = data.get('start_time')
+        data = request.get_json() or {}
+        session = end_session(user_id, quiz_id)
+        if session is None:
+            return jsonify({'error': 'No active session for this quiz; it was already submitted or its time ran out'}), 400
+
+        # Autosaved answers, overridden by whatever the final submission carries
+        answers = dict(session.answers)
+        answers.update({str(question_id): answer for question_id, answer in (data.get('answers') or {}).items()})
 
-        # Handle quiz retakes by deleting previous answers
-        UserAnswer.query.filter_by(user_id=user_id, quiz_id=quiz_id).delete()
-        
-        questions = Question.query.filter_by(quiz_id=quiz_id).all()
-        
-        total_score = 0
-        for question in questions:
-            user_answer = answers.get(str(question.id))
-            
-            new_answer = UserAnswer(
-                user_id=user_id,
-                quiz_id=quiz_id,
-                question_id=question.id,
-                selected_option=user_answer if user_answer else 0,
-            )
-            db.session.add(new_answer)
-            
-            if user_answer and str(user_answer) == str(question.correct_answer):
-                total_score += 1
+        answer_key, result = grade_answers(quiz_id, answers)
 
-        # Calculate time taken
-        time_taken = 0
-        if start_time_str:
-            # --- FIX: Replace 'Z' with '+00:00' to handle the ISO format correctly ---
-            start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-            end_time = datetime.now(timezone.utc)
-            time_taken = (end_time - start_time).total_seconds()
+        # Time comes from the server-side session, capped at the quiz duration
+        time_taken = session.time_taken()
 
         # Create a new score record for this attempt
         new_score = Score(
             user_id=user_id,
             quiz_id=quiz_id,
-            total_scored=total_score,
-            total_questions=len(questions),
-            time_taken=int(time_taken)
+            total_scored=result.score,
+            total_questions=len(answer_key),
+            max_score=result.max_score,
+            correct_answers=result.correct_count,
+            time_taken=time_taken
         )
+        # Answers belong to this attempt, so earlier attempts keep theirs
+        packed = current_app.config['ANSWER_STORAGE'] == 'packed'
+        if packed:
+            new_score.pack_answers(answer_key, result.selected)
         db.session.add(new_score)
+        db.session.flush()
+        if not packed:
+            UserAnswer.insert_for_attempt(new_score, answer_key, result.selected)
+
+        quiz_title, subject_id = db.session.query(Quiz.title, Chapter.subject_id) \
+            .join(Chapter, Chapter.id == Quiz.chapter_id).filter(Quiz.id == quiz_id).one()
+        UserStats.record_attempt(new_score, quiz_title)
         db.session.commit()
+        committed = True
+
+        # The attempt is saved; failures past this point only leave caches stale
+        try:
+            invalidate_chart_data()
+        except Exception as e:
+            print(f"Could not expire the attempts chart: {e}")
+        try:
+            record_score(user_id, quiz_id, subject_id, new_score.percentage)
+        except Exception as e:
+            print(f"Could not update leaderboards: {e}")
+            try:
+                invalidate_leaderboards()  # rebuilt from the database on next read
+            except Exception:
+                pass
 
         return jsonify({
             'message': 'Quiz submitted successfully',
@@ -85,5 +126,32 @@ def submit_quiz(quiz_id):
 
     except Exception as e:
         db.session.rollback()
+        if session is not None and not committed:
+            restore_session(user_id, quiz_id, session)  # let the user submit again
         print(f"An error occurred in submit_quiz: {e}")
         return jsonify({'error': 'An internal error occurred while submitting the quiz.'}), 500
+
+@quiz_bp.route('/attempt/<int:score_id>', methods=['GET'])
+@jwt_required()
+def get_attempt(score_id):
+    """Review one attempt: its score and the answers given in that attempt"""
+    try:
+        user_id = get_jwt_identity()
+        score = Score.query.filter_by(id=score_id, user_id=user_id).first()
+        if not score:
+            return jsonify({'error': 'Score not found'}), 404
+        return jsonify({'score': score.to_dict(), 'results': UserAnswer.attempt_details(score)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@quiz_bp.route('/<int:quiz_id>/leaderboard', methods=['GET'])
+@jwt_required()
+def quiz_leaderboard(quiz_id):
+    """Top users by best percentage on the quiz, and the caller's own rank"""
+    try:
+        if not db.session.query(Quiz.id).filter_by(id=quiz_id).scalar():
+            return jsonify({'error': 'Quiz not found'}), 404
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        return jsonify(leaderboard(QUIZ_BOARD_KEY.format(quiz_id), get_jwt_identity(), limit)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
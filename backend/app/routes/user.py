@@ -1,16 +1,31 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.models.user import User
 from app.models.quiz import Quiz, Question
 from app.models.score import Score
 from app.models.answer import UserAnswer
 from app.models.subject import Subject, Chapter
-from sqlalchemy import func
+from app.models.user_stats import UserStats
+from app.utils.helpers import to_ist, encode_cursor, decode_cursor
+from app.utils.passwords import HashingQueueFull
+from app.utils.leaderboards import SUBJECT_BOARD_KEY, leaderboard
+from app.utils.exports import USER_QUIZ_HEADER, user_quiz_history_query, user_quiz_history_rows, stream_csv
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import joinedload
 
 user_bp = Blueprint('user', __name__)
 
+def _get_user_stats(user_id):
+    """Return the user's UserStats row, backfilling it from scores if missing"""
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        UserStats.rebuild([user_id])
+        db.session.commit()
+        stats = db.session.get(UserStats, user_id)
+    return stats
+
 @user_bp.route('/dashboard/stats', methods=['GET'])
 @jwt_required()
 def get_user_dashboard_stats():
@@ -19,28 +34,12 @@ def get_user_dashboard_stats():
     """
     try:
         user_id = get_jwt_identity()
-        user_scores = Score.query.filter_by(user_id=user_id).all()
-        
-        quizzes_taken = len(user_scores)
-        total_questions_answered = 0
-        average_score = 0
-        best_score = 0
-        
-        if quizzes_taken > 0:
-            total_questions_answered = sum(score.total_questions for score in user_scores)
-            percentages = [((score.total_scored / score.total_questions) * 100) for score in user_scores if score.total_questions > 0]
-            if percentages:
-                average_score = round(sum(percentages) / len(percentages), 1)
-                best_score = round(max(percentages), 1)
-
-        stats = {
-            'quizzes_taken': quizzes_taken,
-            'average_score': average_score,
-            'best_score': best_score,
-            'total_questions_answered': total_questions_answered
-        }
-        return jsonify({'stats': stats}), 200
+        stats = _get_user_stats(user_id)
+        if stats is None:
+            return jsonify({'error': 'User not found'}), 404
+        return jsonify({'stats': stats.to_dict()}), 200
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/dashboard/graph-data', methods=['GET'])
@@ -51,18 +50,14 @@ def get_user_graph_data():
     """
     try:
         user_id = get_jwt_identity()
-        # Get the 10 most recent scores
-        scores = Score.query.filter_by(user_id=user_id).order_by(Score.timestamp_of_attempt.asc()).limit(10).all()
-        
-        labels = []
-        data = []
-        for score in scores:
-            labels.append(score.quiz.title if score.quiz else 'Unknown Quiz')
-            percentage = (score.total_scored / score.total_questions) * 100 if score.total_questions > 0 else 0
-            data.append(round(percentage, 2))
-            
+        # The 10 most recent attempts, oldest first, kept on the stats row
+        stats = _get_user_stats(user_id)
+        recent = (stats.recent_attempts or []) if stats else []
+        labels = [title for title, _ in recent]
+        data = [percentage for _, percentage in recent]
         return jsonify({'labels': labels, 'data': data}), 200
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # (Keep your other user routes like /quizzes, /scores, /profile as they are)
@@ -71,8 +66,9 @@ def get_user_graph_data():
 def get_available_quizzes():
     try:
         user_id = get_jwt_identity()
-        attempted_quiz_ids = {score.quiz_id for score in Score.query.filter_by(user_id=user_id).all()}
-        quizzes = Quiz.query.filter_by(is_active=True).order_by(Quiz.date_of_quiz.desc()).all()
+        attempted_quiz_ids = {quiz_id for (quiz_id,) in db.session.query(Score.quiz_id).filter_by(user_id=user_id).distinct()}
+        quizzes = Quiz.query.options(joinedload(Quiz.chapter).joinedload(Chapter.subject))\
+            .filter_by(is_active=True).order_by(Quiz.date_of_quiz.desc()).all()
         quiz_data = []
         for quiz in quizzes:
             quiz_info = quiz.to_dict()
@@ -82,35 +78,173 @@ def get_available_quizzes():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Start of the date_range filter windows, relative to now (IST)
+DATE_RANGES = {
+    'week': timedelta(days=7),
+    'month': timedelta(days=30)
+}
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format')
+
+def _filter_scores(query, args):
+    """
+    Apply the filters of a scores request: quiz_id, subject_id,
+    date_range (today/week/month) and start_date/end_date (YYYY-MM-DD, inclusive).
+    Raises ValueError for malformed values.
+    """
+    if args.get('quiz_id'):
+        query = query.filter(Score.quiz_id == int(args['quiz_id']))
+    if args.get('subject_id'):
+        subject_quizzes = db.session.query(Quiz.id).join(Quiz.chapter) \
+            .filter(Chapter.subject_id == int(args['subject_id']))
+        query = query.filter(Score.quiz_id.in_(subject_quizzes))
+    date_range = args.get('date_range')
+    if date_range:
+        now = to_ist().replace(tzinfo=None)
+        if date_range == 'today':
+            since = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        elif date_range in DATE_RANGES:
+            since = now - DATE_RANGES[date_range]
+        else:
+            raise ValueError('date_range must be one of: today, week, month')
+        query = query.filter(Score.timestamp_of_attempt >= since)
+    if args.get('start_date'):
+        query = query.filter(Score.timestamp_of_attempt >= _parse_date(args['start_date'], 'start_date'))
+    if args.get('end_date'):
+        end = _parse_date(args['end_date'], 'end_date') + timedelta(days=1)
+        query = query.filter(Score.timestamp_of_attempt < end)
+    return query
+
+SCORE_FIELDS = (
+    'id', 'user_id', 'quiz_id', 'quiz_title', 'total_scored', 'total_questions', 'max_score',
+    'correct_answers', 'percentage', 'time_taken', 'timestamp_of_attempt'
+)
+
+# sort_by values: (column, descending)
+SCORE_SORTS = {
+    'date_desc': (Score.timestamp_of_attempt, True),
+    'date_asc': (Score.timestamp_of_attempt, False),
+    'score_desc': (Score.percentage, True),
+    'score_asc': (Score.percentage, False)
+}
+
 @user_bp.route('/scores', methods=['GET'])
 @jwt_required()
 def get_user_scores():
+    """
+    List the user's attempts from one Score/Quiz join, newest first unless
+    ``sort_by`` is date_asc, score_desc or score_asc.
+
+    ``page`` (with ``per_page``, default 10) returns that page together with
+    ``current_page``, ``total_pages`` and ``total``. Otherwise passing
+    ``limit`` (or ``per_page``) switches to keyset pagination on (sort value,
+    id): the response carries a ``next_cursor`` which is sent back as
+    ``cursor`` for the next page. ``fields`` (comma separated) trims each
+    score to the named keys, and the filters of _filter_scores apply.
+    """
     try:
         user_id = get_jwt_identity()
-        scores = Score.query.filter_by(user_id=user_id).order_by(Score.timestamp_of_attempt.desc()).all()
-        return jsonify([score.to_dict() for score in scores]), 200
+        fields = [f for f in request.args.get('fields', '').split(',') if f]
+        unknown = [f for f in fields if f not in SCORE_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Invalid fields: {', '.join(unknown)}"}), 400
+        sort_by = request.args.get('sort_by', 'date_desc')
+        if sort_by not in SCORE_SORTS:
+            return jsonify({'error': f"sort_by must be one of: {', '.join(SCORE_SORTS)}"}), 400
+        sort_column, descending = SCORE_SORTS[sort_by]
+        page = request.args.get('page', type=int)
+        limit = request.args.get('limit', type=int) or request.args.get('per_page', type=int)
+        if page:
+            page, limit = max(page, 1), limit or 10
+        if limit:
+            limit = max(1, min(limit, 200))
+        cursor = request.args.get('cursor')
+
+        query = db.session.query(Score, Quiz.title, sort_column.label('sort_value')) \
+            .outerjoin(Quiz, Quiz.id == Score.quiz_id).filter(Score.user_id == user_id)
+        try:
+            query = _filter_scores(query, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if cursor and not page:
+            try:
+                last_value, last_id = decode_cursor(cursor)
+                last_value = datetime.fromisoformat(last_value) if sort_by.startswith('date') else float(last_value)
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            key = tuple_(sort_column, Score.id)
+            query = query.filter(key < tuple_(last_value, last_id) if descending else key > tuple_(last_value, last_id))
+
+        total = query.order_by(None).count() if page else None
+        if descending:
+            query = query.order_by(sort_column.desc(), Score.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Score.id.asc())
+        if page:
+            query = query.offset((page - 1) * limit)
+        if limit:
+            query = query.limit(limit)
+
+        rows = query.all()
+        scores = []
+        for score, quiz_title, _ in rows:
+            score_info = score.to_dict(quiz_title=quiz_title)
+            if fields:
+                score_info = {field: score_info[field] for field in fields}
+            scores.append(score_info)
+
+        if page:
+            return jsonify({
+                'scores': scores,
+                'current_page': page,
+                'per_page': limit,
+                'total': total,
+                'total_pages': max((total + limit - 1) // limit, 1)
+            }), 200
+        if not (limit or cursor):
+            return jsonify(scores), 200
+        next_cursor = None
+        if limit and len(rows) == limit:
+            last = rows[-1]
+            last_value = last.sort_value.isoformat() if sort_by.startswith('date') else last.sort_value
+            next_cursor = encode_cursor(last_value, last[0].id)
+        return jsonify({'scores': scores, 'next_cursor': next_cursor}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@user_bp.route('/scores/export', methods=['GET'])
+@jwt_required()
+def export_user_scores():
+    """
+    Stream the user's quiz history as CSV while it is read from the database.
+    Accepts the same quiz_id, subject_id and date_range filters as the scores page.
+    """
+    try:
+        user_id = get_jwt_identity()
+        query = _filter_scores(user_quiz_history_query(user_id), request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    filename = f"quiz-results-{datetime.utcnow().strftime('%Y-%m-%d')}.csv"
+    return current_app.response_class(
+        stream_with_context(stream_csv(USER_QUIZ_HEADER, user_quiz_history_rows(query))),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 @user_bp.route('/scores/<int:score_id>', methods=['GET'])
 @jwt_required()
 def get_score_details(score_id):
     try:
         user_id = get_jwt_identity()
-        score = Score.query.filter_by(id=score_id, user_id=user_id).first_or_404()
-        responses = UserAnswer.query.filter_by(user_id=user_id, quiz_id=score.quiz_id).all()
-        detailed_results = []
-        for res in responses:
-            question = res.question
-            is_correct = str(res.selected_option) == str(question.correct_answer)
-            detailed_results.append({
-                'question_statement': question.question_statement,
-                'options': [question.option1, question.option2, question.option3, question.option4],
-                'correct_answer': question.correct_answer,
-                'selected_answer': res.selected_option,
-                'is_correct': is_correct
-            })
-        return jsonify({'score': score.to_dict(), 'results': detailed_results}), 200
+        score = Score.query.filter_by(id=score_id, user_id=user_id).first()
+        if not score:
+            return jsonify({'error': 'Score not found'}), 404
+        return jsonify({'score': score.to_dict(), 'results': UserAnswer.attempt_details(score)}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -153,6 +287,21 @@ def update_profile():
             'message': 'Profile updated successfully',
             'user': user.to_dict()
         }), 200
+    except HashingQueueFull as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+@user_bp.route('/subjects/<int:subject_id>/leaderboard', methods=['GET'])
+@jwt_required()
+def subject_leaderboard(subject_id):
+    """Top users by the sum of their best percentages over the subject's quizzes"""
+    try:
+        if not db.session.query(Subject.id).filter_by(id=subject_id).scalar():
+            return jsonify({'error': 'Subject not found'}), 404
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        return jsonify(leaderboard(SUBJECT_BOARD_KEY.format(subject_id), get_jwt_identity(), limit)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,8 +1,10 @@
 # Celery tasks module
 from .celery_tasks import (
     send_daily_reminders,
+    send_reminder_batch,
     send_reminder_email,
     send_monthly_reports,
+    send_monthly_report_batch,
     generate_monthly_report,
     export_user_quiz_data,
     export_admin_user_data
@@ -10,8 +12,10 @@ from .celery_tasks import (
 
 __all__ = [
     'send_daily_reminders',
+    'send_reminder_batch',
     'send_reminder_email', 
     'send_monthly_reports',
+    'send_monthly_report_batch',
     'generate_monthly_report',
     'export_user_quiz_data',
     'export_admin_user_data'
@@ -2,7 +2,12 @@
 from .helpers import (
     admin_required,
     user_required,
+    revoke_user_tokens,
+    clear_user_revocation,
+    token_claims,
     validate_required_fields,
+    encode_cursor,
+    decode_cursor,
     format_time_duration,
     calculate_percentage,
     get_performance_level,
@@ -12,7 +17,12 @@ from .helpers import (
 __all__ = [
     'admin_required',
     'user_required',
+    'revoke_user_tokens',
+    'clear_user_revocation',
+    'token_claims',
     'validate_required_fields',
+    'encode_cursor',
+    'decode_cursor',
     'format_time_duration',
     'calculate_percentage',
     'get_performance_level',
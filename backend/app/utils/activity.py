@@ -0,0 +1,84 @@
+# Buffered last_login updates, written in batches off the request path
+import atexit
+import os
+import threading
+import time
+from flask import current_app
+from sqlalchemy import bindparam
+
+class LastLoginBuffer:
+    """
+    Collects login times in memory and writes them with one executemany
+    every `interval` seconds, so this process updates a user's row at most
+    once per interval however often they log in. Pending times are also
+    written at interpreter exit; a crash loses at most one interval.
+    """
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+        self._pending = {}  # user id -> latest login time
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='last-login-flush', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def record(self, user_id, when):
+        with self._lock:
+            self._pending[user_id] = when
+
+    def flush(self):
+        """Write every pending login time in one statement; returns the number of users"""
+        from app import db
+        from app.models.user import User
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        users = User.__table__
+        statement = users.update().where(users.c.id == bindparam('b_user_id')) \
+            .values(last_login=bindparam('b_last_login'))
+        with self.app.app_context():
+            try:
+                db.session.execute(statement, [{'b_user_id': user_id, 'b_last_login': when}
+                                               for user_id, when in pending.items()])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                with self._lock:
+                    for user_id, when in pending.items():
+                        self._pending.setdefault(user_id, when)  # a newer login wins
+                raise
+        return len(pending)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Could not write last_login times, retrying in {self.interval}s: {e}")
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+
+def get_last_login_buffer():
+    """The LastLoginBuffer of this process, started on first use after a fork"""
+    global _buffer, _buffer_pid
+    with _buffer_lock:
+        if _buffer is None or _buffer_pid != os.getpid():
+            _buffer = LastLoginBuffer(current_app._get_current_object(),
+                                      current_app.config.get('LAST_LOGIN_FLUSH_INTERVAL', 60))
+            _buffer_pid = os.getpid()
+        return _buffer
+
+def record_login(user_id, when):
+    """Note a successful login; written by the next batch, or at once when the interval is 0"""
+    if not current_app.config.get('LAST_LOGIN_FLUSH_INTERVAL', 60):
+        from app import db
+        from app.models.user import User
+        db.session.execute(User.__table__.update().where(User.__table__.c.id == user_id).values(last_login=when))
+        db.session.commit()
+        return
+    get_last_login_buffer().record(user_id, when)
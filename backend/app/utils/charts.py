@@ -0,0 +1,13 @@
+# Versioned cache of the admin attempts chart, expired whenever scores change
+from app import cache
+
+CHART_CACHE_TIMEOUT = 60
+CHART_VERSION_KEY = 'admin_chart_data_version'
+
+def chart_data_version():
+    """Current version of the cached attempts histograms, part of their cache keys"""
+    return cache.get(CHART_VERSION_KEY) or 0
+
+def invalidate_chart_data():
+    """Expire every cached attempts histogram; called whenever a Score is written or deleted"""
+    cache.cache.inc(CHART_VERSION_KEY)
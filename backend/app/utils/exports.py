@@ -0,0 +1,207 @@
+# Streaming data exports: CSV rows from single queries, to disk or over HTTP
+import csv
+import gzip
+import io
+import os
+import time
+from datetime import datetime
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_LINK_MAX_AGE = 7 * 86400  # seconds a download link stays valid
+
+USER_PERFORMANCE_HEADER = [
+    'User ID',
+    'Full Name',
+    'Email',
+    'Qualification',
+    'Date of Birth',
+    'Registration Date',
+    'Total Quizzes Taken',
+    'Average Score (%)',
+    'Best Score (%)',
+    'Last Quiz Date',
+    'Performance Level'
+]
+
+def performance_level(avg_score, total_quizzes):
+    if not total_quizzes:
+        return "No Attempts"
+    if avg_score >= 85:
+        return "Excellent"
+    elif avg_score >= 70:
+        return "Good"
+    elif avg_score >= 55:
+        return "Average"
+    return "Below Average"
+
+def user_performance_rows():
+    """
+    Yield the performance export one CSV row per user.
+    All statistics come from one grouped query, streamed in EXPORT_CHUNK_SIZE rows.
+    """
+    from sqlalchemy import func, case
+    from app import db
+    from app.models.user import User
+    from app.models.score import Score
+    total = func.coalesce(Score.max_score, Score.total_questions)
+    percentage = case((total > 0, Score.total_scored * 100.0 / total))  # NULL (skipped) without marks
+    stats = db.session.query(
+        Score.user_id.label('user_id'),
+        func.count(Score.id).label('total_quizzes'),
+        func.avg(percentage).label('avg_score'),
+        func.max(percentage).label('best_score'),
+        func.max(Score.timestamp_of_attempt).label('last_quiz')
+    ).group_by(Score.user_id).subquery()
+    rows = db.session.query(
+        User.id, User.full_name, User.email, User.qualification, User.dob, User.created_at,
+        func.coalesce(stats.c.total_quizzes, 0), stats.c.avg_score, stats.c.best_score, stats.c.last_quiz
+    ).outerjoin(stats, stats.c.user_id == User.id).filter(User.role == 'user').order_by(User.id) \
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+
+    for user_id, full_name, email, qualification, dob, created_at, total_quizzes, avg_score, best_score, last_quiz in rows:
+        avg_score = avg_score or 0
+        yield [
+            user_id,
+            full_name,
+            email,
+            qualification,
+            dob.strftime('%Y-%m-%d') if dob else '',
+            created_at.strftime('%Y-%m-%d') if created_at else '',
+            total_quizzes,
+            f"{avg_score:.2f}",
+            f"{best_score or 0:.2f}",
+            last_quiz.strftime('%Y-%m-%d') if total_quizzes and last_quiz else "Never",
+            performance_level(avg_score, total_quizzes)
+        ]
+
+USER_QUIZ_HEADER = [
+    'Quiz ID',
+    'Quiz Title',
+    'Chapter',
+    'Subject',
+    'Date Attempted',
+    'Score',
+    'Total Questions',
+    'Percentage',
+    'Time Taken (seconds)',
+    'Remarks'
+]
+
+def attempt_remarks(percentage):
+    if percentage >= 90:
+        return "Excellent"
+    elif percentage >= 75:
+        return "Good"
+    elif percentage >= 60:
+        return "Average"
+    return "Needs Improvement"
+
+def user_quiz_history_query(user_id):
+    """One Score -> Quiz -> Chapter -> Subject join over a user's attempts, newest first"""
+    from app import db
+    from app.models.score import Score
+    from app.models.quiz import Quiz
+    from app.models.subject import Subject, Chapter
+    return db.session.query(
+        Score.quiz_id, Quiz.title, Chapter.name, Subject.name, Score.timestamp_of_attempt,
+        Score.total_scored, Score.total_questions, Score.percentage, Score.time_taken
+    ).outerjoin(Quiz, Quiz.id == Score.quiz_id) \
+        .outerjoin(Chapter, Chapter.id == Quiz.chapter_id) \
+        .outerjoin(Subject, Subject.id == Chapter.subject_id) \
+        .filter(Score.user_id == user_id) \
+        .order_by(Score.timestamp_of_attempt.desc(), Score.id.desc())
+
+def user_quiz_history_rows(query):
+    """Yield USER_QUIZ_HEADER rows from user_quiz_history_query, EXPORT_CHUNK_SIZE rows at a time"""
+    for quiz_id, quiz_title, chapter_name, subject_name, attempted_at, total_scored, total_questions, percentage, time_taken \
+            in query.execution_options(yield_per=EXPORT_CHUNK_SIZE):
+        yield [
+            quiz_id,
+            quiz_title or 'Unknown Quiz',
+            chapter_name or 'Unknown',
+            subject_name or 'Unknown',
+            attempted_at.strftime('%Y-%m-%d %H:%M:%S'),
+            total_scored,
+            total_questions,
+            f"{percentage:.2f}%",
+            time_taken or 0,
+            attempt_remarks(percentage)
+        ]
+
+def stream_csv(header, rows, chunk_rows=100):
+    """Yield CSV text in chunks of chunk_rows rows, holding only one chunk in memory"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    pending = 1
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+def export_dir():
+    directory = current_app.config.get('EXPORT_DIR') or os.path.join(current_app.instance_path, 'exports')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def write_csv_gz(filename, header, rows):
+    """Stream rows into a gzip-compressed CSV in export_dir(); returns (path, row count)"""
+    path = os.path.join(export_dir(), filename)
+    count = 0
+    with gzip.open(path + '.tmp', 'wt', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    os.replace(path + '.tmp', path)  # readers never see a half-written file
+    return path, count
+
+def prune_exports():
+    """Delete export files older than EXPORT_LINK_MAX_AGE, whose links have expired; returns how many"""
+    directory = export_dir()
+    cutoff = time.time() - EXPORT_LINK_MAX_AGE
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass  # removed meanwhile by another worker
+    return removed
+
+def write_user_performance_export():
+    """Write the user performance export for a download link, pruning expired ones; returns (filename, number of users)"""
+    prune_exports()
+    filename = f"user_performance_data_{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}.csv.gz"
+    _, count = write_csv_gz(filename, USER_PERFORMANCE_HEADER, user_performance_rows())
+    return filename, count
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='export-download')
+
+def export_token(filename):
+    """Signed token that grants download of one export file"""
+    return _serializer().dumps(filename)
+
+def export_download_url(filename):
+    """Absolute, signed download link for an export file, usable without a login"""
+    base = current_app.config.get('BACKEND_URL') or 'http://localhost:5000'
+    return f"{base.rstrip('/')}/api/admin/exports/{filename}?token={export_token(filename)}"
+
+def load_export_token(token):
+    """Return the filename a download token was issued for, or None if invalid or expired"""
+    try:
+        return _serializer().loads(token, max_age=EXPORT_LINK_MAX_AGE)
+    except BadSignature:
+        return None
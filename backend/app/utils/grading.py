@@ -0,0 +1,126 @@
+# Quiz grading engine: compiled answer keys and batched answer-sheet grading
+from array import array
+from app.utils.quiz_cache import LRUCache, get_versioned
+
+# Number of selected options for every 4-bit option mask
+_POPCOUNT = [bin(i).count('1') for i in range(16)]
+# The two masks held by every packed byte, low nibble first
+_UNPACKED = [bytes((b & 0x0F, b >> 4)) for b in range(256)]
+
+_answer_keys = LRUCache(maxsize=512)
+
+def option_mask(value):
+    """
+    Convert an answer to a 4-bit option mask (bit 0 = option 1).
+    Accepts 3, '3', '1,3' or [1, 3]; blanks and out-of-range options map to 0.
+    """
+    if value is None or value == '':
+        return 0
+    if isinstance(value, (list, tuple)):
+        parts = value
+    else:
+        parts = str(value).split(',')
+    mask = 0
+    for part in parts:
+        try:
+            option = int(str(part).strip())
+        except ValueError:
+            continue
+        if 1 <= option <= 4:
+            mask |= 1 << (option - 1)
+    return mask
+
+def mask_answer(mask):
+    """Inverse of option_mask: 0 when blank, the option number, or '1,3' for several"""
+    options = [option for option in range(1, 5) if mask & 1 << (option - 1)]
+    if len(options) > 1:
+        return ','.join(map(str, options))
+    return options[0] if options else 0
+
+def pack_masks(masks):
+    """Pack a sheet of 4-bit option masks two to a byte, the first in the low nibble"""
+    masks = bytes(masks)
+    if len(masks) % 2:
+        masks += b'\x00'
+    return bytes(low | high << 4 for low, high in zip(masks[::2], masks[1::2]))
+
+def unpack_masks(data, count):
+    """Unpack the first count option masks of a sheet packed by pack_masks"""
+    return array('B', b''.join(map(_UNPACKED.__getitem__, data))[:count])
+
+class AnswerKey:
+    """Compact answer key for one quiz, with one array slot per question"""
+
+    __slots__ = ('quiz_id', 'question_ids', 'positions', 'correct_masks',
+                 'multiple', 'marks', 'negative_marks', 'max_score')
+
+    def __init__(self, quiz_id, rows):
+        self.quiz_id = quiz_id
+        self.question_ids = array('l')
+        self.correct_masks = array('B')
+        self.multiple = array('B')
+        self.marks = array('d')
+        self.negative_marks = array('d')
+        for question_id, correct_answer, marks, negative_marks, type_ in rows:
+            self.question_ids.append(question_id)
+            self.correct_masks.append(option_mask(correct_answer))
+            self.multiple.append(1 if type_ == 'multiple' else 0)
+            self.marks.append(marks if marks is not None else 1)
+            self.negative_marks.append(negative_marks or 0)
+        self.positions = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        self.max_score = sum(self.marks)
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def selection_masks(self, answers):
+        """Lay out an answer sheet ({question_id: answer}) as masks in key order"""
+        return array('B', (option_mask(answers.get(str(question_id), answers.get(question_id)))
+                           for question_id in self.question_ids))
+
+    def grade(self, selected):
+        """
+        Grade a whole sheet of selection masks in one pass over the key arrays.
+
+        Single-choice questions earn full marks for the exact option and lose
+        negative marks for any other. Multi-select questions lose negative marks
+        if any wrong option is picked, otherwise earn marks in proportion to the
+        correct options selected. Unanswered questions score zero.
+        """
+        awarded = array('d', (
+            0.0 if not sel else
+            marks if sel == correct else
+            -negative if (sel & ~correct) or not multiple else
+            marks * _POPCOUNT[sel] / _POPCOUNT[correct]
+            for sel, correct, multiple, marks, negative in zip(
+                selected, self.correct_masks, self.multiple, self.marks, self.negative_marks)
+        ))
+        correct_count = sum(1 for sel, correct in zip(selected, self.correct_masks) if sel and sel == correct)
+        return GradeResult(round(sum(awarded), 2), self.max_score, correct_count, awarded, selected)
+
+class GradeResult:
+    __slots__ = ('score', 'max_score', 'correct_count', 'awarded', 'selected')
+
+    def __init__(self, score, max_score, correct_count, awarded, selected):
+        self.score = score
+        self.max_score = max_score
+        self.correct_count = correct_count
+        self.awarded = awarded
+        self.selected = selected  # the graded selection masks, in key order
+
+def build_answer_key(quiz_id):
+    """Load the grading columns of a quiz's questions in a single query"""
+    from app.models.quiz import Question
+    rows = Question.query.with_entities(
+        Question.id, Question.correct_answer, Question.marks, Question.negative_marks, Question.type
+    ).filter_by(quiz_id=quiz_id).order_by(Question.id).all()
+    return AnswerKey(quiz_id, rows)
+
+def get_answer_key(quiz_id):
+    """Return the compiled answer key for a quiz, building it on first use"""
+    return get_versioned(_answer_keys, quiz_id, build_answer_key)
+
+def grade_answers(quiz_id, answers):
+    """Grade an answer sheet ({question_id: answer}) against a quiz's answer key"""
+    key = get_answer_key(quiz_id)
+    return key, key.grade(key.selection_masks(answers))
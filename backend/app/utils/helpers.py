@@ -1,8 +1,10 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-# from app.models.user import User  # Moved import inside functions to avoid circular import
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 import pytz
+import json
+import base64
+import time
 from datetime import datetime
 
 def to_ist(dt=None):
@@ -18,15 +20,88 @@ def to_ist(dt=None):
         dt = pytz.utc.localize(dt)
     return dt.astimezone(ist)
 
+# Token revocation: a token is accepted while its 'ver' claim is at least
+# the user's users.token_version, which is bumped to revoke issued tokens.
+# That version is cached under one key per user (ALL_REVOKED once the user is
+# deleted) and read back from the database whenever the key is missing, so a
+# flushed or evicted cache cannot bring an old token back. Each process also
+# keeps what it read for REVOCATION_TTL seconds so most checks stay in memory.
+TOKEN_VERSION_KEY = 'token_version:{}'
+TOKEN_VERSION_TIMEOUT = 86400
+ALL_REVOKED = -1
+REVOCATION_TTL = 30
+REVOCATION_MEMO_MAX = 10000
+
+_token_versions = {}  # user id -> (lowest accepted version, read at)
+
+def _remember_token_version(user_id, version):
+    if len(_token_versions) >= REVOCATION_MEMO_MAX:
+        _token_versions.clear()
+    _token_versions[user_id] = (version, time.monotonic())
+
+def _min_token_version(user_id):
+    """Lowest token version accepted for a user, or ALL_REVOKED"""
+    entry = _token_versions.get(user_id)
+    if entry is not None and time.monotonic() - entry[1] < REVOCATION_TTL:
+        return entry[0]
+    from app import cache, db
+    from app.models.user import User
+    key = TOKEN_VERSION_KEY.format(user_id)
+    try:
+        version = cache.get(key)
+    except Exception:
+        version = None  # cache unreachable: ask the database
+    if version is None:
+        row = db.session.query(User.token_version).filter_by(id=user_id).first()
+        version = ALL_REVOKED if row is None else (row[0] or 0)
+        try:
+            cache.set(key, version, timeout=TOKEN_VERSION_TIMEOUT)
+        except Exception:
+            pass
+    _remember_token_version(user_id, version)
+    return version
+
+def revoke_user_tokens(user_id, min_version=None):
+    """
+    Reject tokens of a user issued before min_version, or all of them when
+    min_version is None (deleted accounts). Call after committing the new
+    users.token_version or the delete. Takes effect at once in this process
+    and within REVOCATION_TTL seconds in every other one.
+    """
+    from app import cache
+    version = ALL_REVOKED if min_version is None else min_version
+    cache.set(TOKEN_VERSION_KEY.format(int(user_id)), version, timeout=TOKEN_VERSION_TIMEOUT)
+    _remember_token_version(int(user_id), version)
+
+def clear_user_revocation(user_id):
+    """Forget the cached version of a user id, e.g. when a new account reuses it"""
+    from app import cache
+    cache.delete(TOKEN_VERSION_KEY.format(int(user_id)))
+    _token_versions.pop(int(user_id), None)
+
+def token_claims(user):
+    """Additional JWT claims checked by admin_required and user_required"""
+    return {'role': user.role, 'ver': user.token_version or 0}
+
+def _token_error():
+    """Return an error response if the current token is stale or revoked, else None"""
+    claims = get_jwt()
+    if 'role' not in claims or 'ver' not in claims:
+        return jsonify({'error': 'Token is outdated, please log in again'}), 401
+    min_version = _min_token_version(int(get_jwt_identity()))
+    if min_version == ALL_REVOKED or claims['ver'] < min_version:
+        return jsonify({'error': 'Token has been revoked'}), 401
+    return None
+
 def admin_required(f):
     """Decorator to require admin access"""
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        user_id = get_jwt_identity()
-        from app.models.user import User
-        user = User.query.get(user_id)
-        if not user or user.role != 'admin':
+        error = _token_error()
+        if error:
+            return error
+        if get_jwt()['role'] != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         return f(*args, **kwargs)
     return decorated_function
@@ -36,14 +111,28 @@ def user_required(f):
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        user_id = get_jwt_identity()
-        from app.models.user import User
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        error = _token_error()
+        if error:
+            return error
         return f(*args, **kwargs)
     return decorated_function
 
+def encode_cursor(*values):
+    """Encode keyset pagination values as an opaque, URL-safe cursor"""
+    raw = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
 def validate_required_fields(data, required_fields):
     """Validate that all required fields are present in data"""
     missing_fields = []
@@ -0,0 +1,334 @@
+# Quiz and subject leaderboards kept in sorted sets, updated as quizzes are submitted
+import json
+import threading
+from bisect import bisect_left, insort
+from app import cache
+
+QUIZ_BOARD_KEY = 'leaderboard:quiz:{}'        # user -> best percentage on the quiz
+SUBJECT_BOARD_KEY = 'leaderboard:subject:{}'  # user -> sum of best percentages over the subject's quizzes
+BOARDS_KEY = 'leaderboard:boards'             # every board key, for rebuilds and user removal
+BUILT_KEY = 'leaderboard:built'               # set once the boards hold every score in the database
+REBUILD_LOCK_KEY = 'leaderboard:rebuild'      # held while boards are loaded from the database
+PENDING_KEY = 'leaderboard:pending'           # scores recorded during a rebuild, replayed after it
+
+REBUILD_LOCK_TIMEOUT = 60  # seconds before a crashed rebuild's lock expires
+REBUILD_WAIT = 10          # seconds a targeted rebuild waits for a running one
+
+# Raise a user's best on a quiz and add the improvement to their subject total, atomically
+_RECORD_BEST = """
+local old = redis.call('ZSCORE', KEYS[1], ARGV[2])
+local new = tonumber(ARGV[1])
+if old and tonumber(old) >= new then return 0 end
+redis.call('ZADD', KEYS[1], new, ARGV[2])
+redis.call('ZINCRBY', KEYS[2], new - (tonumber(old) or 0), ARGV[2])
+redis.call('SADD', KEYS[3], KEYS[1], KEYS[2])
+return 1
+"""
+
+class RedisLeaderboardStore:
+    """Boards as Redis sorted sets: updates, ranks and top-K are O(log n)"""
+
+    def __init__(self, client, key_prefix=''):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._record_best = client.register_script(_RECORD_BEST)
+
+    def record_best(self, quiz_key, subject_key, member, score):
+        p = self.key_prefix
+        return bool(self._record_best(keys=[p + quiz_key, p + subject_key, p + BOARDS_KEY], args=[score, member]))
+
+    def top(self, key, limit):
+        return [(int(member), score) for member, score in
+                self.client.zrevrange(self.key_prefix + key, 0, limit - 1, withscores=True)]
+
+    def rank(self, key, member):
+        """(1-based rank, score) of a member, tied scores sharing a rank; None if absent"""
+        key = self.key_prefix + key
+        score = self.client.zscore(key, member)
+        if score is None:
+            return None
+        return self.client.zcount(key, f'({score}', '+inf') + 1, score
+
+    def size(self, key):
+        return self.client.zcard(self.key_prefix + key)
+
+    def replace(self, boards, drop=None):
+        """
+        Write the given {key: {member: score}} boards in one transaction, after
+        deleting the `drop` keys. With drop=None every board is replaced and the
+        boards are marked built.
+        """
+        p = self.key_prefix
+        old = self.client.smembers(p + BOARDS_KEY) if drop is None else [p + key for key in drop]
+        pipe = self.client.pipeline()
+        if drop is None:
+            pipe.delete(p + BOARDS_KEY)
+        if old:
+            pipe.delete(*old)
+            pipe.srem(p + BOARDS_KEY, *old)
+        for key, scores in boards.items():
+            pipe.delete(p + key)
+            pipe.zadd(p + key, scores)
+            pipe.sadd(p + BOARDS_KEY, p + key)
+        if drop is None:
+            pipe.set(p + BUILT_KEY, 1)
+        pipe.execute()
+
+    def remove_member(self, member):
+        keys = self.client.smembers(self.key_prefix + BOARDS_KEY)
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.zrem(key, member)
+        pipe.execute()
+
+    def is_built(self):
+        return bool(self.client.exists(self.key_prefix + BUILT_KEY))
+
+    def invalidate(self):
+        self.client.delete(self.key_prefix + BUILT_KEY)
+
+    def acquire_rebuild(self, wait):
+        """The rebuild lock, or None if another process holds it for `wait` seconds"""
+        lock = self.client.lock(self.key_prefix + REBUILD_LOCK_KEY, timeout=REBUILD_LOCK_TIMEOUT,
+                                blocking_timeout=wait or None)
+        return lock if lock.acquire(blocking=bool(wait)) else None
+
+    def release_rebuild(self, lock):
+        from redis.exceptions import LockError
+        try:
+            lock.release()
+        except LockError:
+            pass  # expired; a later rebuild may be running
+
+    def is_rebuilding(self):
+        return bool(self.client.exists(self.key_prefix + REBUILD_LOCK_KEY))
+
+    def push_pending(self, quiz_key, subject_key, member, score):
+        self.client.rpush(self.key_prefix + PENDING_KEY, json.dumps([quiz_key, subject_key, member, score]))
+
+    def take_pending(self):
+        pipe = self.client.pipeline()
+        pipe.lrange(self.key_prefix + PENDING_KEY, 0, -1)
+        pipe.delete(self.key_prefix + PENDING_KEY)
+        return [json.loads(event) for event in pipe.execute()[0]]
+
+class _SortedBoard:
+    __slots__ = ('entries', 'scores')
+
+    def __init__(self):
+        self.entries = []  # (-score, member), ascending: best first
+        self.scores = {}
+
+    def set(self, member, score):
+        if member in self.scores:
+            self.entries.pop(bisect_left(self.entries, (-self.scores[member], member)))
+        self.scores[member] = score
+        insort(self.entries, (-score, member))
+
+    def remove(self, member):
+        if member in self.scores:
+            self.entries.pop(bisect_left(self.entries, (-self.scores.pop(member), member)))
+
+class MemoryLeaderboardStore:
+    """
+    Per-process stand-in for RedisLeaderboardStore when the cache is not Redis.
+    Ranks and top-K are binary searches; an update shifts a Python list.
+    """
+
+    def __init__(self):
+        self._boards = {}
+        self._built = False
+        self._pending = []
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def record_best(self, quiz_key, subject_key, member, score):
+        with self._lock:
+            quiz_board = self._boards.setdefault(quiz_key, _SortedBoard())
+            old = quiz_board.scores.get(member)
+            if old is not None and old >= score:
+                return False
+            quiz_board.set(member, score)
+            subject_board = self._boards.setdefault(subject_key, _SortedBoard())
+            subject_board.set(member, subject_board.scores.get(member, 0) + score - (old or 0))
+            return True
+
+    def top(self, key, limit):
+        with self._lock:
+            board = self._boards.get(key)
+            return [(member, -score) for score, member in board.entries[:limit]] if board else []
+
+    def rank(self, key, member):
+        with self._lock:
+            board = self._boards.get(key)
+            if board is None or member not in board.scores:
+                return None
+            score = board.scores[member]
+            return bisect_left(board.entries, (-score,)) + 1, score
+
+    def size(self, key):
+        with self._lock:
+            board = self._boards.get(key)
+            return len(board.scores) if board else 0
+
+    def replace(self, boards, drop=None):
+        rebuilt = {}
+        for key, scores in boards.items():
+            board = rebuilt[key] = _SortedBoard()
+            board.scores = dict(scores)
+            board.entries = sorted((-score, member) for member, score in scores.items())
+        with self._lock:
+            if drop is None:
+                self._boards = rebuilt
+                self._built = True
+            else:
+                for key in drop:
+                    self._boards.pop(key, None)
+                self._boards.update(rebuilt)
+
+    def remove_member(self, member):
+        with self._lock:
+            for board in self._boards.values():
+                board.remove(member)
+
+    def is_built(self):
+        return self._built
+
+    def invalidate(self):
+        self._built = False
+
+    def acquire_rebuild(self, wait):
+        acquired = self._rebuild_lock.acquire(timeout=wait) if wait else self._rebuild_lock.acquire(blocking=False)
+        return self._rebuild_lock if acquired else None
+
+    def release_rebuild(self, lock):
+        lock.release()
+
+    def is_rebuilding(self):
+        return self._rebuild_lock.locked()
+
+    def push_pending(self, quiz_key, subject_key, member, score):
+        with self._lock:
+            self._pending.append([quiz_key, subject_key, member, score])
+
+    def take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            return pending
+
+_memory_store = MemoryLeaderboardStore()
+
+def get_leaderboard_store():
+    """Redis-backed when the cache is Redis (shared by every worker), else per process"""
+    client = getattr(cache.cache, '_write_client', None)
+    if client is not None:
+        return RedisLeaderboardStore(client, cache.cache.key_prefix)
+    return _memory_store
+
+def _load_boards(store, subject_ids=None, drop_quiz_ids=()):
+    """
+    Load boards from each user's best percentage per quiz, in one grouped query:
+    every board, or only those of the given subjects. Scores recorded while
+    the query ran are replayed on top. Call with the rebuild lock held.
+    """
+    from sqlalchemy import func
+    from app import db
+    from app.models.score import Score
+    from app.models.quiz import Quiz
+    from app.models.subject import Chapter
+    rows = db.session.query(
+        Score.user_id, Score.quiz_id, Chapter.subject_id, func.max(Score.percentage)
+    ).join(Quiz, Quiz.id == Score.quiz_id).join(Chapter, Chapter.id == Quiz.chapter_id) \
+        .group_by(Score.user_id, Score.quiz_id, Chapter.subject_id)
+    drop = None
+    if subject_ids is not None:
+        rows = rows.filter(Chapter.subject_id.in_(subject_ids))
+        # Boards of quizzes no longer scored, moved away or deleted go too
+        quiz_ids = db.session.query(Quiz.id).join(Chapter).filter(Chapter.subject_id.in_(subject_ids))
+        drop = [SUBJECT_BOARD_KEY.format(subject_id) for subject_id in subject_ids] + \
+               [QUIZ_BOARD_KEY.format(quiz_id) for quiz_id in {id for (id,) in quiz_ids} | set(drop_quiz_ids)]
+    boards = {}
+    for user_id, quiz_id, subject_id, best in rows:
+        best = round(best, 2)
+        boards.setdefault(QUIZ_BOARD_KEY.format(quiz_id), {})[user_id] = best
+        subject = boards.setdefault(SUBJECT_BOARD_KEY.format(subject_id), {})
+        subject[user_id] = subject.get(user_id, 0) + best
+    store.replace(boards, drop)
+    # Replaying a score the query already saw is a no-op: only improvements count
+    for quiz_key, subject_key, member, score in store.take_pending():
+        store.record_best(quiz_key, subject_key, member, score)
+    return len(boards)
+
+def rebuild_leaderboards(subject_ids=None, drop_quiz_ids=(), wait=REBUILD_WAIT):
+    """
+    Reload every board from the scores table, or only the boards of `subject_ids`
+    (dropping those of `drop_quiz_ids`). One rebuild runs at a time; returns the
+    number of boards written, or None if another rebuild held the lock for `wait` seconds.
+    """
+    store = get_leaderboard_store()
+    lock = store.acquire_rebuild(wait)
+    if lock is None:
+        return None
+    try:
+        return _load_boards(store, subject_ids, drop_quiz_ids)
+    finally:
+        store.release_rebuild(lock)
+
+def refresh_leaderboards(subject_ids, drop_quiz_ids=()):
+    """Reload the boards of subjects whose quizzes were deleted or moved; falls back to a full rebuild on next read"""
+    if rebuild_leaderboards([id for id in set(subject_ids) if id is not None], drop_quiz_ids) is None:
+        invalidate_leaderboards()
+
+def record_score(user_id, quiz_id, subject_id, percentage):
+    """Fold a committed attempt into its quiz and subject boards"""
+    store = get_leaderboard_store()
+    event = (QUIZ_BOARD_KEY.format(quiz_id), SUBJECT_BOARD_KEY.format(subject_id), int(user_id), round(percentage, 2))
+    if store.is_rebuilding():
+        store.push_pending(*event)  # the rebuild may have read the scores table before this commit
+    if store.is_built():
+        store.record_best(*event)
+    # else the next rebuild reads this attempt from the database
+
+def remove_user(user_id):
+    get_leaderboard_store().remove_member(int(user_id))
+
+def invalidate_leaderboards():
+    """Rebuild every board on next read, e.g. when an update to them failed"""
+    get_leaderboard_store().invalidate()
+
+def _ensure_built(store):
+    """
+    Load the boards on first read. Only the reader that takes the rebuild lock
+    loads them; the others serve the boards as they are meanwhile.
+    """
+    lock = store.acquire_rebuild(0)
+    if lock is None:
+        return
+    try:
+        if not store.is_built():
+            _load_boards(store)
+    finally:
+        store.release_rebuild(lock)
+
+def leaderboard(key, user_id=None, limit=10):
+    """
+    The top `limit` entries of a board with names, plus the user's own rank.
+    Ties share a rank (1, 2, 2, 4).
+    """
+    from app import db
+    from app.models.user import User
+    store = get_leaderboard_store()
+    if not store.is_built():
+        _ensure_built(store)
+    top = store.top(key, limit)
+    names = dict(db.session.query(User.id, User.full_name).filter(User.id.in_([m for m, _ in top]))) if top else {}
+    entries = []
+    for position, (member, score) in enumerate(top):
+        rank = entries[-1]['rank'] if entries and score == entries[-1]['score'] else position + 1
+        entries.append({'rank': rank, 'user_id': member, 'full_name': names.get(member), 'score': round(score, 2)})
+    me = store.rank(key, int(user_id)) if user_id is not None else None
+    return {
+        'leaderboard': entries,
+        'total': store.size(key),
+        'me': {'rank': me[0], 'score': round(me[1], 2)} if me else None
+    }
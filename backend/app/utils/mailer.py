@@ -0,0 +1,148 @@
+# Batched mail delivery over persistent connections
+import os
+import smtplib
+import time
+from flask import current_app
+from flask_mail import Connection
+from app import mail
+
+def is_transient(error):
+    """Whether a delivery error is worth retrying on a fresh connection"""
+    if isinstance(error, smtplib.SMTPConnectError):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPNotSupportedError)):
+        return False
+    return isinstance(error, OSError)
+
+class FileSinkHost:
+    """Stands in for an SMTP session, writing each message to an .eml file"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = f'{os.getpid()}-{time.time_ns()}'
+        self.count = 0
+
+    def sendmail(self, from_addr, to_addrs, msg, *args):
+        self.count += 1
+        path = os.path.join(self.directory, f'{self.prefix}-{self.count:06d}.eml')
+        with open(path, 'wb') as f:
+            f.write(msg)
+
+    def quit(self):
+        pass
+
+class FileSinkConnection(Connection):
+    """flask_mail connection that delivers to a local directory instead of SMTP"""
+
+    def __init__(self, mail, directory):
+        super().__init__(mail)
+        self.directory = directory
+
+    def configure_host(self):
+        return FileSinkHost(self.directory)
+
+class DeliveryReport:
+    __slots__ = ('sent', 'failed')
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = []  # [(message, error), ...]
+
+class MailDispatcher:
+    """
+    Send messages in batches of MAIL_BATCH_SIZE, each over one connection.
+
+    Sending is throttled to MAIL_RATE_LIMIT messages per second (0 = no
+    limit) in this process. A transient failure reopens the connection
+    and resumes with the failed message after an exponential backoff,
+    up to MAIL_MAX_RETRIES times. Permanent failures are recorded and the
+    batch carries on. MAIL_BACKEND = 'file' delivers to MAIL_FILE_SINK_DIR.
+    """
+
+    def __init__(self, backend=None, batch_size=None, rate_limit=None, max_retries=None, retry_backoff=None):
+        config = current_app.config
+        self.backend = backend or config.get('MAIL_BACKEND', 'smtp')
+        self.batch_size = batch_size or config.get('MAIL_BATCH_SIZE', 100)
+        self.rate_limit = rate_limit if rate_limit is not None else config.get('MAIL_RATE_LIMIT', 0)
+        self.max_retries = max_retries if max_retries is not None else config.get('MAIL_MAX_RETRIES', 3)
+        self.retry_backoff = retry_backoff if retry_backoff is not None else config.get('MAIL_RETRY_BACKOFF', 1.0)
+        self.sink_dir = config.get('MAIL_FILE_SINK_DIR') or os.path.join(current_app.instance_path, 'mail_outbox')
+        self._next_send = 0.0
+
+    def connect(self):
+        if self.backend == 'file':
+            return FileSinkConnection(current_app.extensions['mail'], self.sink_dir)
+        return mail.connect()
+
+    def _throttle(self):
+        if not self.rate_limit:
+            return
+        now = time.monotonic()
+        if self._next_send > now:
+            time.sleep(self._next_send - now)
+            now = self._next_send
+        self._next_send = now + 1.0 / self.rate_limit
+
+    def send(self, message):
+        """Send a single message, raising its error if delivery failed"""
+        report = self.send_many([message])
+        if report.failed:
+            raise report.failed[0][1]
+
+    def send_many(self, messages, on_result=None):
+        """
+        Send an iterable of messages and return a DeliveryReport.
+        on_result(message, error) is called once per message, with error None
+        when it was delivered.
+        """
+        report = DeliveryReport()
+        batch = []
+        for message in messages:
+            batch.append(message)
+            if len(batch) >= self.batch_size:
+                self._send_batch(batch, report, on_result)
+                batch = []
+        if batch:
+            self._send_batch(batch, report, on_result)
+        return report
+
+    def _send_batch(self, batch, report, on_result):
+        position = 0
+        attempt = 0
+        while position < len(batch):
+            try:
+                with self.connect() as conn:
+                    while position < len(batch):
+                        message = batch[position]
+                        self._throttle()
+                        try:
+                            conn.send(message)
+                        except Exception as e:
+                            if is_transient(e):
+                                raise
+                            self._record(report, on_result, message, e)
+                        else:
+                            self._record(report, on_result, message, None)
+                        position += 1
+                        attempt = 0
+            except Exception as e:
+                if position >= len(batch):
+                    break  # every message is handled; only closing the session failed
+                if not is_transient(e) or attempt >= self.max_retries:
+                    for message in batch[position:]:
+                        self._record(report, on_result, message, e)
+                    break
+                attempt += 1
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+    @staticmethod
+    def _record(report, on_result, message, error):
+        if error is None:
+            report.sent += 1
+        else:
+            report.failed.append((message, error))
+        if on_result:
+            on_result(message, error)
@@ -0,0 +1,103 @@
+# Password hashing with a configurable algorithm and cost, run on a bounded thread pool
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class HashingQueueFull(Exception):
+    """More password hashes are waiting than PASSWORD_HASH_QUEUE_MAX allows"""
+
+def hash_password(password, algorithm='bcrypt', rounds=12):
+    """Hash with bcrypt at the given cost, or with any werkzeug method ('scrypt', 'pbkdf2:sha256')"""
+    if algorithm == 'bcrypt':
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+    return generate_password_hash(password, method=algorithm)
+
+def verify_password(password_hash, password):
+    """Check a password against a bcrypt hash or a werkzeug hash from before bcrypt"""
+    if password_hash.startswith('$2'):
+        return bcrypt.checkpw(password.encode(), password_hash.encode())
+    return check_password_hash(password_hash, password)
+
+def needs_rehash(password_hash, algorithm='bcrypt', rounds=12):
+    """Whether a hash was made with another algorithm or cost than the configured one"""
+    if algorithm == 'bcrypt':
+        # $2b$12$...: the cost sits between the second and third '$'
+        return not password_hash.startswith('$2') or password_hash.split('$')[2] != f'{rounds:02d}'
+    return not password_hash.startswith(algorithm + ':') and password_hash.split('$')[0] != algorithm
+
+class PasswordHasher:
+    """
+    Runs hashing and verification on at most `workers` threads, so a burst
+    of logins cannot take every CPU from other requests. bcrypt releases
+    the GIL while it works. Calls beyond `workers` wait in a queue; once
+    `max_queue` are waiting, new ones fail fast with HashingQueueFull.
+    """
+
+    def __init__(self, workers, max_queue, algorithm='bcrypt', rounds=12):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.algorithm = algorithm
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HashingQueueFull('Too many logins in progress, please retry shortly')
+            self._pending += 1
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.algorithm, self.rounds)
+
+    def verify(self, password_hash, password):
+        return self._run(verify_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return needs_rehash(password_hash, self.algorithm, self.rounds)
+
+    def stats(self):
+        with self._lock:
+            pending = self._pending
+        return {
+            'algorithm': self.algorithm,
+            'rounds': self.rounds if self.algorithm == 'bcrypt' else None,
+            'workers': self.workers,
+            'in_progress': min(pending, self.workers),
+            'queue_depth': max(pending - self.workers, 0),
+            'max_queue': self.max_queue,
+            'completed': self.completed,
+            'rejected': self.rejected
+        }
+
+_hasher = None
+_hasher_pid = None
+_hasher_lock = threading.Lock()
+
+def get_hasher():
+    """The process-wide PasswordHasher, created from the app config on first use after a fork"""
+    global _hasher, _hasher_pid
+    with _hasher_lock:
+        if _hasher is None or _hasher_pid != os.getpid():
+            config = current_app.config
+            _hasher = PasswordHasher(
+                config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1,
+                config.get('PASSWORD_HASH_QUEUE_MAX', 64),
+                config.get('PASSWORD_HASH_ALGORITHM', 'bcrypt'),
+                config.get('PASSWORD_HASH_ROUNDS', 12)
+            )
+            _hasher_pid = os.getpid()
+        return _hasher
@@ -0,0 +1,113 @@
+# SQL statement caps per endpoint, checked on a scratch database filled with sample data
+import os
+from datetime import date, timedelta
+from sqlalchemy import event
+
+# (name, role of the caller, path, most statements allowed). Caps do not grow
+# with the data: an endpoint above its cap is issuing a query per row.
+ENDPOINT_QUERY_CAPS = [
+    ('user dashboard stats', 'user', '/api/user/dashboard/stats', 1),
+    ('user dashboard graph', 'user', '/api/user/dashboard/graph-data', 1),
+    ('user quizzes', 'user', '/api/user/quizzes', 2),
+    ('user scores', 'user', '/api/user/scores', 1),
+    ('user scores, page 2', 'user', '/api/user/scores?page=2&per_page=10&sort_by=score_desc', 2),
+    ('admin dashboard stats', 'admin', '/api/admin/dashboard/stats', 5),
+    ('admin users', 'admin', '/api/admin/users', 1),
+    ('admin users, keyset page', 'admin', '/api/admin/users?limit=10', 1),
+    ('admin subjects', 'admin', '/api/admin/subjects', 1),
+    ('admin chapters', 'admin', '/api/admin/chapters', 1),
+    ('admin quizzes', 'admin', '/api/admin/quizzes', 1)
+]
+
+def create_scratch_app(database_url='sqlite://'):
+    """An app on an empty database (in-memory SQLite by default) with a per-process cache"""
+    from app import create_app
+    scratch = {'DATABASE_URL': database_url, 'CACHE_TYPE': 'SimpleCache'}
+    saved = {name: os.environ.get(name) for name in scratch}
+    os.environ.update(scratch)
+    try:
+        return create_app()
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def seed_sample_data(users=20, subjects=3, chapters=3, quizzes=3, questions=5):
+    """Fill the schema with users who each attempted every quiz; returns (admin id, user id)"""
+    from app import db
+    from app.commands import ensure_admin
+    from app.models.user import User
+    from app.models.subject import Subject, Chapter
+    from app.models.quiz import Quiz, Question
+    from app.models.score import Score
+    from app.models.user_stats import UserStats
+    from app.utils.helpers import to_ist
+    db.create_all()
+    ensure_admin('admin@quizmaster.com', 'admin123')
+    admin_id = User.query.filter_by(role='admin').first().id
+    for s in range(subjects):
+        subject = Subject(name=f'Subject {s}', description='')
+        db.session.add(subject)
+        for c in range(chapters):
+            chapter = Chapter(name=f'Chapter {s}.{c}', description='', subject=subject)
+            db.session.add(chapter)
+            for q in range(quizzes):
+                quiz = Quiz(title=f'Quiz {s}.{c}.{q}', chapter=chapter, creator_id=admin_id, duration=10, date_of_quiz=date.today())
+                quiz.questions = [Question(question_statement=f'Question {n}', option1='a', option2='b', option3='c',
+                                           option4='d', correct_answer='1', marks=1, negative_marks=0, type='single')
+                                  for n in range(questions)]
+                db.session.add(quiz)
+    db.session.flush()
+    quiz_ids = [quiz.id for quiz in Quiz.query]
+    user_ids = []
+    now = to_ist()
+    for u in range(users):
+        user = User(email=f'user{u}@example.com', full_name=f'User {u}', qualification='', dob=date(2000, 1, 1))
+        user.password_hash = '!'  # cannot log in
+        db.session.add(user)
+        db.session.flush()
+        user_ids.append(user.id)
+        db.session.add_all(Score(user_id=user.id, quiz_id=quiz_id, total_scored=(u + i) % (questions + 1),
+                                 total_questions=questions, max_score=questions, correct_answers=0, time_taken=60,
+                                 timestamp_of_attempt=now - timedelta(days=i))
+                           for i, quiz_id in enumerate(quiz_ids))
+    db.session.flush()
+    UserStats.rebuild(user_ids)
+    db.session.commit()
+    return admin_id, user_ids[0]
+
+def auth_headers(user_id):
+    """Authorization header of a fresh access token for a user; needs an app context"""
+    from flask_jwt_extended import create_access_token
+    from app import db
+    from app.models.user import User
+    from app.utils.helpers import token_claims
+    user = db.session.get(User, user_id)
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id), additional_claims=token_claims(user))}'}
+
+def count_endpoint_queries(app, callers):
+    """(name, path, statements, cap) per endpoint, each called once with a cold cache"""
+    from app import db, cache
+    with app.app_context():
+        headers = {role: auth_headers(user_id) for role, user_id in callers.items()}
+        engine = db.engine
+    statements = []
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        client = app.test_client()
+        results = []
+        for name, role, path, cap in ENDPOINT_QUERY_CAPS:
+            with app.app_context():
+                cache.clear()
+            statements.clear()
+            response = client.get(path, headers=headers[role])
+            if response.status_code != 200:
+                raise RuntimeError(f'{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+            results.append((name, path, list(statements), cap))
+        return results
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
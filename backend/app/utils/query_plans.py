@@ -0,0 +1,53 @@
+# EXPLAIN-based checks that the hot query shapes are served by indexes
+import re
+from app import db
+
+def hot_queries():
+    """(name, query) pairs mirroring the filters and orderings used by the routes and tasks"""
+    from app.models.score import Score
+    from app.models.quiz import Quiz, Question
+    from app.models.answer import UserAnswer
+    return [
+        ('user scores, newest first', Score.query.filter(Score.user_id == 1)
+            .order_by(Score.timestamp_of_attempt.desc(), Score.id.desc())),
+        ('user scores since a date', Score.query.filter(Score.user_id == 1, Score.timestamp_of_attempt >= '2000-01-01')),
+        ('scores of a quiz', Score.query.filter(Score.quiz_id == 1)),
+        ('questions of a quiz', Question.query.filter(Question.quiz_id == 1).order_by(Question.id)),
+        ('answers of a user for a quiz', UserAnswer.query.filter(UserAnswer.user_id == 1, UserAnswer.quiz_id == 1)),
+        ('answers of an attempt', UserAnswer.query.filter(UserAnswer.score_id == 1).order_by(UserAnswer.question_id)),
+        ('active quizzes, newest first', Quiz.query.filter(Quiz.is_active == True).order_by(Quiz.date_of_quiz.desc())),
+        ('quizzes of a chapter', Quiz.query.filter(Quiz.chapter_id == 1))
+    ]
+
+# Databases whose plans explain() can read
+EXPLAIN_DIALECTS = ('sqlite', 'postgresql')
+
+def explain(query):
+    """Return the database's query plan for a query as a list of lines"""
+    dialect = db.engine.dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    with db.engine.connect() as conn:
+        if dialect.name == 'sqlite':
+            return [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)]
+        if dialect.name == 'postgresql':
+            # Tiny tables are cheaper to scan, so ask whether an index *can* serve the query
+            with conn.begin():
+                conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+                return [row[0] for row in conn.exec_driver_sql('EXPLAIN ' + sql)]
+    raise NotImplementedError(f'No query plan check for {dialect.name}')
+
+# Plan lines that read a whole table: SQLite "SCAN t" without an index, PostgreSQL "Seq Scan on t"
+_SCAN_PATTERNS = (
+    re.compile(r'^SCAN (\w+)$'),
+    re.compile(r'Seq Scan on (\w+)')
+)
+
+def table_scans(plan):
+    """Return the tables a plan reads with a full scan"""
+    tables = []
+    for line in plan:
+        for pattern in _SCAN_PATTERNS:
+            match = pattern.search(line.strip())
+            if match:
+                tables.append(match.group(1))
+    return tables
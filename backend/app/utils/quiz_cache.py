@@ -0,0 +1,113 @@
+# Versioned caching for data derived from a quiz and its questions
+import json
+import threading
+from collections import OrderedDict
+from app import cache
+
+QUIZ_VERSION_KEY = 'quiz_version:{}'
+QUIZ_PAPER_KEY = 'quiz_paper:v2:{}:{}'  # v2: papers carry the duration
+QUIZ_PAPER_TIMEOUT = 3600
+
+class LRUCache:
+    """Small thread-safe, per-process LRU cache"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+def get_quiz_version(quiz_id):
+    """
+    Return the content version of a quiz.
+    The counter lives in the shared cache backend so every worker sees a bump.
+    """
+    return cache.get(QUIZ_VERSION_KEY.format(quiz_id)) or 0
+
+def bump_quiz_version(quiz_id):
+    """Invalidate everything cached from a quiz or its questions, in every worker"""
+    # Flask-Caching has no atomic increment; the backend (INCR on Redis) does
+    return cache.cache.inc(QUIZ_VERSION_KEY.format(quiz_id))
+
+def get_versioned(local_cache, quiz_id, builder):
+    """
+    Return builder(quiz_id) from local_cache, rebuilding it when the quiz
+    version has moved since the cached value was built.
+    """
+    version = get_quiz_version(quiz_id)
+    entry = local_cache.get(quiz_id)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    value = builder(quiz_id)
+    local_cache.set(quiz_id, (version, value))
+    return value
+
+_papers = LRUCache(maxsize=128)
+
+def build_paper(quiz_id):
+    """
+    Serialize the answer-free paper of a quiz.
+
+    Returns None for an unknown quiz, otherwise an (error, body, duration)
+    tuple where body is the JSON object as bytes with its closing brace left
+    off, so per-request fields can be appended without re-encoding the paper.
+    """
+    from sqlalchemy.orm import joinedload, selectinload
+    from app.models.quiz import Quiz
+    from app.models.subject import Chapter
+    quiz = Quiz.query.options(
+        joinedload(Quiz.chapter).joinedload(Chapter.subject),
+        selectinload(Quiz.questions)
+    ).filter_by(id=quiz_id).first()
+    if quiz is None:
+        return None
+    if not quiz.is_active:
+        return 'Quiz is not active', None, None
+    if not quiz.questions:
+        return 'Quiz has no questions', None, None
+    questions = sorted(quiz.questions, key=lambda q: q.id)
+    body = json.dumps({
+        'quiz': quiz.to_dict(),
+        'questions': [q.to_dict_without_answer() for q in questions]
+    }, separators=(',', ':'))
+    return None, body[:-1].encode(), quiz.duration
+
+def get_paper(quiz_id):
+    """
+    Return the cached paper of a quiz (see build_paper).
+    Looks in the per-process LRU first, then the shared cache backend.
+    """
+    version = get_quiz_version(quiz_id)
+    entry = _papers.get(quiz_id)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    key = QUIZ_PAPER_KEY.format(quiz_id, version)
+    paper = cache.get(key)
+    if paper is None:
+        paper = build_paper(quiz_id)
+        if paper is None:
+            return None
+        cache.set(key, paper, timeout=QUIZ_PAPER_TIMEOUT)
+    _papers.set(quiz_id, (version, paper))
+    return paper
@@ -0,0 +1,220 @@
+# Server-side quiz sessions: start time, question order and autosaved answers
+import json
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from flask import current_app
+from app import cache
+
+QUIZ_SESSION_KEY = 'quiz_session:{}:{}'
+ANSWER_FIELD = 'q:'  # prefix of the answer fields; the other fields hold the session itself
+
+# Autosave into a session only while it exists: a late autosave must not
+# recreate a session that submit already consumed (it would lack 'sid')
+_UPDATE_SESSION = """
+if redis.call('HEXISTS', KEYS[1], 'sid') == 0 then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIREAT', KEYS[1], ARGV[1])
+return 1
+"""
+
+def _session_fields(fields):
+    """Hash fields of a session, or None if there are none or they lack 'sid'"""
+    return fields if fields and 'sid' in fields else None
+
+class RedisSessionStore:
+    """
+    Sessions as Redis hashes on the cache's connection: a few fixed fields
+    plus one field per answered question, so an autosave is an HSET.
+    """
+
+    def __init__(self, client, key_prefix=''):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._update = client.register_script(_UPDATE_SESSION)
+
+    def create(self, key, fields, ttl):
+        key = self.key_prefix + key
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, ttl)
+        pipe.execute()
+
+    def get(self, key, names):
+        """Values of the named fields, or None if there is no session"""
+        values = self.client.hmget(self.key_prefix + key, ['sid'] + names)
+        if values[0] is None:
+            return None
+        return [value.decode() if value is not None else None for value in values[1:]]
+
+    def get_all(self, key):
+        fields = self.client.hgetall(self.key_prefix + key)
+        return _session_fields({name.decode(): value.decode() for name, value in fields.items()})
+
+    def update(self, key, fields, expire_at):
+        """Set fields of a session; False if the session no longer exists"""
+        args = [int(expire_at) + 1]
+        for name, value in fields.items():
+            args += [name, value]
+        # Re-applying the deadline drops the hash again should it have expired since it was read
+        return bool(self._update(keys=[self.key_prefix + key], args=args))
+
+    def pop(self, key):
+        """Return all fields of a session and delete it, atomically"""
+        key = self.key_prefix + key
+        pipe = self.client.pipeline()
+        pipe.hgetall(key)
+        pipe.delete(key)
+        fields = pipe.execute()[0]
+        return _session_fields({name.decode(): value.decode() for name, value in fields.items()})
+
+class MemorySessionStore:
+    """Per-process stand-in for RedisSessionStore when the cache is not Redis"""
+
+    def __init__(self):
+        self._sessions = {}  # key -> (expires at, fields)
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._sessions.get(key)
+        if entry is not None and entry[0] <= time.time():
+            del self._sessions[key]
+            return None
+        return entry
+
+    def create(self, key, fields, ttl):
+        now = time.time()
+        with self._lock:
+            for stale in [k for k, (expires, _) in self._sessions.items() if expires <= now]:
+                del self._sessions[stale]
+            self._sessions[key] = (now + ttl, dict(fields))
+
+    def get(self, key, names):
+        with self._lock:
+            entry = self._live(key)
+            return [entry[1].get(name) for name in names] if entry and 'sid' in entry[1] else None
+
+    def get_all(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return _session_fields(dict(entry[1])) if entry else None
+
+    def update(self, key, fields, expire_at):
+        with self._lock:
+            entry = self._live(key)
+            if not entry or 'sid' not in entry[1]:
+                return False
+            entry[1].update(fields)
+            return True
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._live(key)
+            if entry:
+                del self._sessions[key]
+            return _session_fields(dict(entry[1])) if entry else None
+
+_memory_store = MemorySessionStore()
+
+def get_session_store():
+    """Redis-backed when the cache is Redis (shared by every worker), else per process"""
+    client = getattr(cache.cache, '_write_client', None)
+    if client is not None:
+        return RedisSessionStore(client, cache.cache.key_prefix)
+    return _memory_store
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+class QuizSession:
+    __slots__ = ('session_id', 'started_at', 'expires_at', 'question_ids', 'answers')
+
+    def __init__(self, session_id, started_at, expires_at, question_ids=None, answers=None):
+        self.session_id = session_id
+        self.started_at = started_at  # epoch seconds
+        self.expires_at = expires_at
+        self.question_ids = question_ids or []
+        self.answers = answers or {}  # {question_id (str): answer}
+
+    @classmethod
+    def from_fields(cls, fields):
+        return cls(
+            fields['sid'], float(fields['started']), float(fields['expires']), json.loads(fields['order']),
+            {name[len(ANSWER_FIELD):]: json.loads(value) for name, value in fields.items() if name.startswith(ANSWER_FIELD)}
+        )
+
+    def to_fields(self):
+        return {'sid': self.session_id, 'started': repr(self.started_at),
+                'expires': repr(self.expires_at), 'order': json.dumps(self.question_ids)}
+
+    def time_taken(self, now=None):
+        """Seconds spent on the quiz, capped at its duration"""
+        return round(min(now or time.time(), self.expires_at) - self.started_at)
+
+    def to_dict(self):
+        return {
+            'session_id': self.session_id,
+            'start_time': _isoformat(self.started_at),
+            'expires_at': _isoformat(self.expires_at),
+            'saved_answers': self.answers
+        }
+
+def _grace():
+    return current_app.config.get('QUIZ_SESSION_GRACE', 30)
+
+def start_session(user_id, quiz_id, duration, question_ids):
+    """
+    Start a quiz for a user, or resume the session already running for it
+    so reloading the page keeps the clock and the autosaved answers.
+    The session expires QUIZ_SESSION_GRACE seconds after the duration (minutes) ends.
+    """
+    store = get_session_store()
+    key = QUIZ_SESSION_KEY.format(user_id, quiz_id)
+    fields = store.get_all(key)
+    if fields:
+        return QuizSession.from_fields(fields)
+    now = time.time()
+    session = QuizSession(secrets.token_urlsafe(16), now, now + duration * 60, list(question_ids))
+    store.create(key, session.to_fields(), int(duration * 60 + _grace()))
+    return session
+
+def save_answers(user_id, quiz_id, answers, session_id=None):
+    """
+    Autosave answers ({question_id: answer}) into the running session,
+    reading and writing a fixed number of hash fields per call.
+    Raises LookupError without a live session, ValueError for a stale session_id.
+    """
+    store = get_session_store()
+    key = QUIZ_SESSION_KEY.format(user_id, quiz_id)
+    values = store.get(key, ['sid', 'expires'])
+    if values is None:
+        raise LookupError('No active quiz session')
+    current_id, expires_at = values[0], float(values[1])
+    if session_id and session_id != current_id:
+        raise ValueError('This quiz session was replaced by a newer one')
+    if time.time() > expires_at + _grace():
+        raise LookupError('Quiz time is over')
+    if answers and not store.update(key, {ANSWER_FIELD + str(question_id): json.dumps(answer)
+                                          for question_id, answer in answers.items()}, expires_at + _grace()):
+        raise LookupError('No active quiz session')  # submitted meanwhile
+    return expires_at
+
+def end_session(user_id, quiz_id):
+    """Consume a user's session for a quiz; None if it never started or has expired"""
+    fields = get_session_store().pop(QUIZ_SESSION_KEY.format(user_id, quiz_id))
+    if not fields:
+        return None
+    session = QuizSession.from_fields(fields)
+    if time.time() > session.expires_at + _grace():
+        return None
+    return session
+
+def restore_session(user_id, quiz_id, session):
+    """Put back a session taken by end_session whose submission then failed"""
+    fields = session.to_fields()
+    fields.update({ANSWER_FIELD + str(question_id): json.dumps(answer) for question_id, answer in session.answers.items()})
+    ttl = int(session.expires_at + _grace() - time.time())
+    if ttl > 0:
+        get_session_store().create(QUIZ_SESSION_KEY.format(user_id, quiz_id), fields, ttl)
@@ -0,0 +1,86 @@
+# Monthly activity reports: data loading, HTML and optional PDF rendering
+import io
+from itertools import groupby
+from flask import current_app
+
+MONTHLY_REPORT_TEMPLATE = 'monthly_report.html'
+
+def load_monthly_scores(user_ids, since):
+    """
+    Load the attempts of several users since a date in one joined query.
+    Returns {user_id: [(score, quiz_title), ...]}, oldest attempt first.
+    """
+    from app import db
+    from app.models.score import Score
+    from app.models.quiz import Quiz
+    rows = db.session.query(Score, Quiz.title).outerjoin(Quiz, Quiz.id == Score.quiz_id).filter(
+        Score.user_id.in_(user_ids),
+        Score.timestamp_of_attempt >= since
+    ).order_by(Score.user_id, Score.timestamp_of_attempt, Score.id)
+    return {user_id: list(group) for user_id, group in groupby(rows, key=lambda row: row[0].user_id)}
+
+def build_monthly_report(user, scores, since, until):
+    """Summarize a user's (score, quiz_title) pairs into the values the report shows"""
+    total_marks = sum(score.total_marks for score, _ in scores)
+    total_scored = sum(score.total_scored for score, _ in scores)
+    return {
+        'full_name': user.full_name,
+        'period_start': since.strftime('%B %d, %Y'),
+        'period_end': until.strftime('%B %d, %Y'),
+        'total_quizzes': len(scores),
+        'total_questions': sum(score.total_questions for score, _ in scores),
+        'total_correct': sum(score.correct_count for score, _ in scores),
+        'average_score': total_scored / total_marks * 100 if total_marks > 0 else 0,
+        'rows': [{
+            'quiz_title': title or 'Unknown Quiz',
+            'attempted_at': score.timestamp_of_attempt.strftime('%Y-%m-%d %H:%M'),
+            'score': f"{score.total_scored:g}/{score.total_marks:g}",
+            'percentage': score.percentage,
+            'time_taken': f"{score.time_taken // 60}:{score.time_taken % 60:02d}" if score.time_taken else "N/A"
+        } for score, title in scores]
+    }
+
+def render_monthly_report_html(report):
+    # The app's Jinja environment compiles the template once and caches it
+    template = current_app.jinja_env.get_template(MONTHLY_REPORT_TEMPLATE)
+    return template.render(report=report)
+
+def render_monthly_report_pdf(report):
+    """Render a report as PDF bytes, or return None when reportlab is not installed"""
+    try:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    except ImportError:
+        return None
+    from xml.sax.saxutils import escape
+
+    styles = getSampleStyleSheet()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, title=f"Monthly Quiz Report - {report['full_name']}")
+    story = [
+        Paragraph('Monthly Quiz Report', styles['Title']),
+        Paragraph(f"Report for {escape(report['full_name'])}", styles['Normal']),
+        Paragraph(f"Period: {report['period_start']} - {report['period_end']}", styles['Normal']),
+        Spacer(1, 12),
+        Paragraph('Summary Statistics', styles['Heading2']),
+        Paragraph(f"Total Quizzes Attempted: {report['total_quizzes']}", styles['Normal']),
+        Paragraph(f"Total Questions Answered: {report['total_questions']}", styles['Normal']),
+        Paragraph(f"Total Correct Answers: {report['total_correct']}", styles['Normal']),
+        Paragraph(f"Average Score: {report['average_score']:.2f}%", styles['Normal']),
+        Spacer(1, 12),
+        Paragraph('Quiz Details', styles['Heading2'])
+    ]
+    data = [['Quiz Title', 'Date Attempted', 'Score', 'Percentage', 'Time Taken']]
+    data += [[row['quiz_title'], row['attempted_at'], row['score'], f"{row['percentage']:.2f}%", row['time_taken']]
+             for row in report['rows']]
+    table = Table(data, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e9ecef')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold')
+    ]))
+    story.append(table)
+    doc.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,175 @@
+# Full-text search over questions, quizzes and chapters
+import logging
+import re
+from sqlalchemy import text, inspect, select, union_all, case, and_, or_, func
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# One search_index row per question, quiz and chapter, keyed by id * 4 + kind.
+# Database triggers (see the search_index migration) keep it in sync on every write.
+KINDS = {'question': 1, 'quiz': 2, 'chapter': 3}
+KIND_NAMES = {kind: name for name, kind in KINDS.items()}
+
+# Databases with a search_index; others fall back to LIKE matching
+SEARCH_DIALECTS = ('sqlite', 'postgresql')
+
+# Indexed text per kind: (table, title, body), columns prefixed by {row};
+# title matches rank above body matches
+DOCUMENTS = {
+    'question': ('questions', "{row}question_statement",
+                 "coalesce({row}option1, '') || ' ' || coalesce({row}option2, '') || ' ' || "
+                 "coalesce({row}option3, '') || ' ' || coalesce({row}option4, '')"),
+    'quiz': ('quizzes', "{row}title", "coalesce({row}description, '')"),
+    'chapter': ('chapters', "{row}name", "coalesce({row}description, '')")
+}
+
+MAX_TERMS = 8
+
+# bm25 is lower-is-better, so every dialect ranks ascending
+_SQLITE_SEARCH = """
+SELECT key, rank FROM (
+    SELECT rowid AS key, bm25(search_index, 4.0, 1.0) AS rank
+    FROM search_index WHERE search_index MATCH :query
+) WHERE key % 4 IN ({kinds}) {after}
+ORDER BY rank, key LIMIT :limit
+"""
+
+_POSTGRESQL_SEARCH = """
+SELECT key, rank FROM (
+    SELECT key, -ts_rank(document, query) AS rank
+    FROM search_index, to_tsquery('simple', :query) AS query WHERE document @@ query
+) AS ranked WHERE key % 4 IN ({kinds}) {after}
+ORDER BY rank, key LIMIT :limit
+"""
+
+_index_available = {}  # engine url -> whether search_index exists
+
+def has_search_index():
+    """Whether this database has a search_index to query, checked once per process"""
+    url = str(db.engine.url)
+    if url not in _index_available:
+        available = db.engine.dialect.name in SEARCH_DIALECTS and inspect(db.engine).has_table('search_index')
+        if not available:
+            logger.warning('No full-text search index on this %s database; searching with LIKE',
+                           db.engine.dialect.name)
+        _index_available[url] = available
+    return _index_available[url]
+
+def search_terms(q):
+    """The words of a search box query, lower-cased; punctuation and operators are dropped"""
+    return re.findall(r'\w+', (q or '').lower())[:MAX_TERMS]
+
+def _match_query(dialect, terms):
+    # Every term must match, each as a prefix of a word
+    if dialect == 'sqlite':
+        return ' '.join(f'"{term}"*' for term in terms)
+    return ' & '.join(f'{term}:*' for term in terms)
+
+def _like_matches(terms, kinds, limit, after):
+    """
+    search() without an index: every term must appear somewhere in the text,
+    rows matching every term in the title first. Reads whole tables.
+    """
+    from app.models.quiz import Quiz, Question
+    from app.models.subject import Chapter
+    columns = {
+        'question': (Question, Question.question_statement,
+                     [Question.option1, Question.option2, Question.option3, Question.option4]),
+        'quiz': (Quiz, Quiz.title, [Quiz.description]),
+        'chapter': (Chapter, Chapter.name, [Chapter.description])
+    }
+    patterns = ['%' + term.replace('_', r'\_') + '%' for term in terms]
+    selects = []
+    for kind in kinds:
+        model, title, body = columns[kind]
+        in_title = and_(*[func.lower(title).like(p, escape='\\') for p in patterns])
+        selects.append(select(
+            (model.id * 4 + KINDS[kind]).label('key'),
+            case((in_title, -2.0), else_=-1.0).label('rank')
+        ).where(*[or_(*[func.lower(column).like(p, escape='\\') for column in [title] + body]) for p in patterns]))
+    matches = union_all(*selects).subquery()
+    query = select(matches.c.key, matches.c.rank)
+    if after:
+        query = query.where(or_(matches.c.rank > after[0], and_(matches.c.rank == after[0], matches.c.key > after[1])))
+    return db.session.execute(query.order_by(matches.c.rank, matches.c.key).limit(limit))
+
+def search(q, kinds=None, limit=20, after=None):
+    """
+    Ranked matches as (kind name, id, rank, key), best first, at most `limit`.
+    `after` is the (rank, key) of the last match of the previous page.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+    kinds = list(kinds or KINDS)
+    if not has_search_index():
+        rows = _like_matches(terms, kinds, limit, after)
+    else:
+        dialect = db.engine.dialect.name
+        params = {'query': _match_query(dialect, terms), 'limit': limit}
+        if after:
+            params['after_rank'], params['after_key'] = after
+        sql = (_SQLITE_SEARCH if dialect == 'sqlite' else _POSTGRESQL_SEARCH).format(
+            kinds=', '.join(str(KINDS[kind]) for kind in kinds),
+            after='AND (rank > :after_rank OR (rank = :after_rank AND key > :after_key))' if after else ''
+        )
+        rows = db.session.execute(text(sql), params)
+    return [(KIND_NAMES[key % 4], key // 4, rank, key) for key, rank in rows]
+
+def load_results(matches):
+    """Serialize matches in rank order with one query per kind; rows deleted meanwhile are skipped"""
+    from sqlalchemy.orm import joinedload
+    from app.models.quiz import Quiz, Question
+    from app.models.subject import Chapter
+    models = {
+        'question': (Question, []),
+        'quiz': (Quiz, [joinedload(Quiz.chapter).joinedload(Chapter.subject)]),
+        'chapter': (Chapter, [joinedload(Chapter.subject)])
+    }
+    found = {}
+    for kind, (model, options) in models.items():
+        ids = [id for match_kind, id, _, _ in matches if match_kind == kind]
+        if ids:
+            found.update({(kind, row.id): row for row in model.query.options(*options).filter(model.id.in_(ids))})
+    return [{'type': kind, 'id': id, 'item': found[kind, id].to_dict()}
+            for kind, id, _, _ in matches if (kind, id) in found]
+
+def ensure_search_triggers(connection):
+    """
+    Create any missing SQLite sync trigger. SQLite batch migrations copy a
+    table into a new one and drop its triggers, so this runs after every
+    migration. PostgreSQL keeps its triggers through ALTER TABLE.
+    """
+    if connection.dialect.name != 'sqlite' or not inspect(connection).has_table('search_index'):
+        return
+    for kind, (table, title, body) in DOCUMENTS.items():
+        key = KINDS[kind]
+        upsert = (f"INSERT OR REPLACE INTO search_index (rowid, title, body) "
+                  f"VALUES (new.id * 4 + {key}, {title.format(row='new.')}, {body.format(row='new.')});")
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS search_index_{table}_insert "
+                                f"AFTER INSERT ON {table} BEGIN {upsert} END"))
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS search_index_{table}_update AFTER UPDATE ON {table} BEGIN "
+                                f"DELETE FROM search_index WHERE rowid = old.id * 4 + {key}; {upsert} END"))
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS search_index_{table}_delete AFTER DELETE ON {table} BEGIN "
+                                f"DELETE FROM search_index WHERE rowid = old.id * 4 + {key}; END"))
+
+def rebuild_search_index():
+    """Re-index every question, quiz and chapter; returns the number of rows indexed, None without an index"""
+    if not has_search_index():
+        return None
+    dialect = db.engine.dialect.name
+    ensure_search_triggers(db.session.connection())
+    db.session.execute(text('DELETE FROM search_index'))
+    count = 0
+    for kind, (table, title, body) in DOCUMENTS.items():
+        title, body = title.format(row=''), body.format(row='')
+        if dialect == 'sqlite':
+            sql = f"INSERT INTO search_index (rowid, title, body) SELECT id * 4 + {KINDS[kind]}, {title}, {body} FROM {table}"
+        else:
+            sql = (f"INSERT INTO search_index (key, document) SELECT id::bigint * 4 + {KINDS[kind]}, "
+                   f"setweight(to_tsvector('simple', coalesce({title}, '')), 'A') || "
+                   f"setweight(to_tsvector('simple', {body}), 'B') FROM {table}")
+        count += db.session.execute(text(sql)).rowcount
+    db.session.commit()
+    return count
@@ -1,8 +1,8 @@
-from app import create_app
-from app.tasks.celery_tasks import celery
+from app.tasks.celery_tasks import celery, get_flask_app
 
-app = create_app()
-app.app_context().push()
+# Built once here and inherited by every worker process;
+# each task pushes its own app context (see AppContextTask)
+app = get_flask_app()
 
 if __name__ == '__main__':
     celery.start()
@@ -0,0 +1,57 @@
+"""answers per attempt
+
+Revision ID: 2ef887052104
+Revises: 1a9fe4e85d00
+Create Date: 2026-10-18 10:01:30.079674
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2ef887052104'
+down_revision = '1a9fe4e85d00'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_answers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('score_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_user_answers_score_id_scores', 'scores', ['score_id'], ['id'])
+
+    # Retakes used to overwrite answers, so the surviving rows belong to the latest attempt
+    op.execute("""
+        UPDATE user_answers SET score_id = (
+            SELECT scores.id FROM scores
+            WHERE scores.user_id = user_answers.user_id AND scores.quiz_id = user_answers.quiz_id
+            ORDER BY scores.timestamp_of_attempt DESC, scores.id DESC
+            LIMIT 1
+        )
+    """)
+
+    with op.batch_alter_table('user_answers', schema=None) as batch_op:
+        batch_op.drop_constraint('_user_quiz_question_uc', type_='unique')
+        batch_op.create_unique_constraint('_score_question_uc', ['score_id', 'question_id'])
+        # The dropped constraint was the only index on a user's answers
+        batch_op.create_index('ix_user_answers_user_id_quiz_id', ['user_id', 'quiz_id'], unique=False)
+
+
+def downgrade():
+    # Only the latest attempt's answers fit the old one-row-per-question constraint
+    op.execute("""
+        DELETE FROM user_answers WHERE score_id IS NOT NULL AND score_id <> (
+            SELECT scores.id FROM scores
+            WHERE scores.user_id = user_answers.user_id AND scores.quiz_id = user_answers.quiz_id
+            ORDER BY scores.timestamp_of_attempt DESC, scores.id DESC
+            LIMIT 1
+        )
+    """)
+
+    with op.batch_alter_table('user_answers', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_answers_user_id_quiz_id')
+        batch_op.drop_constraint('_score_question_uc', type_='unique')
+        batch_op.create_unique_constraint('_user_quiz_question_uc', ['user_id', 'quiz_id', 'question_id'])
+        batch_op.drop_constraint('fk_user_answers_score_id_scores', type_='foreignkey')
+        batch_op.drop_column('score_id')
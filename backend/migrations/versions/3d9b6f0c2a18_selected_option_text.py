@@ -0,0 +1,37 @@
+"""selected option text
+
+Revision ID: 3d9b6f0c2a18
+Revises: 7c2e4a91d5b3
+Create Date: 2026-10-18 14:12:05.204417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d9b6f0c2a18'
+down_revision = '7c2e4a91d5b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Multi-select answers are stored as '1,3', which an integer column cannot hold
+    with op.batch_alter_table('user_answers', schema=None) as batch_op:
+        batch_op.alter_column('selected_option',
+               existing_type=sa.INTEGER(),
+               type_=sa.String(length=7),
+               existing_nullable=False,
+               postgresql_using='selected_option::varchar')
+
+
+def downgrade():
+    # Multi-select answers keep only their first option
+    op.execute("UPDATE user_answers SET selected_option = substr(selected_option, 1, 1) WHERE selected_option LIKE '%,%'")
+    with op.batch_alter_table('user_answers', schema=None) as batch_op:
+        batch_op.alter_column('selected_option',
+               existing_type=sa.String(length=7),
+               type_=sa.INTEGER(),
+               existing_nullable=False,
+               postgresql_using='selected_option::integer')
@@ -0,0 +1,117 @@
+"""search index
+
+Revision ID: 7c2e4a91d5b3
+Revises: ecee551346ce
+Create Date: 2026-10-18 11:42:37.518204
+
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e4a91d5b3'
+down_revision = 'ecee551346ce'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# search_index holds one row per question, quiz and chapter, keyed by id * 4 + kind
+# (1 question, 2 quiz, 3 chapter), with a title and a body text. Triggers keep it
+# in sync on every write. SQLite batch migrations rebuild a table and drop its
+# triggers; migrations/env.py creates missing ones again after every run.
+DOCUMENTS = [
+    # (table, kind, title, body), columns of the trigger's row prefixed by {row}
+    ('questions', 1, "{row}question_statement",
+     "coalesce({row}option1, '') || ' ' || coalesce({row}option2, '') || ' ' || "
+     "coalesce({row}option3, '') || ' ' || coalesce({row}option4, '')"),
+    ('quizzes', 2, "{row}title", "coalesce({row}description, '')"),
+    ('chapters', 3, "{row}name", "coalesce({row}description, '')")
+]
+
+
+def _sqlite_upgrade():
+    # prefix='2 3' keeps extra indexes of 2- and 3-character prefixes for "alg"* queries
+    op.execute("CREATE VIRTUAL TABLE search_index USING fts5("
+               "title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+    for table, kind, title, body in DOCUMENTS:
+        upsert = (f"INSERT OR REPLACE INTO search_index (rowid, title, body) "
+                  f"VALUES (new.id * 4 + {kind}, {title.format(row='new.')}, {body.format(row='new.')});")
+        op.execute(f"CREATE TRIGGER search_index_{table}_insert AFTER INSERT ON {table} BEGIN {upsert} END")
+        op.execute(f"CREATE TRIGGER search_index_{table}_update AFTER UPDATE ON {table} BEGIN "
+                   f"DELETE FROM search_index WHERE rowid = old.id * 4 + {kind}; {upsert} END")
+        op.execute(f"CREATE TRIGGER search_index_{table}_delete AFTER DELETE ON {table} BEGIN "
+                   f"DELETE FROM search_index WHERE rowid = old.id * 4 + {kind}; END")
+        op.execute(f"INSERT INTO search_index (rowid, title, body) "
+                   f"SELECT id * 4 + {kind}, {title.format(row='')}, {body.format(row='')} FROM {table}")
+
+
+def _postgresql_upgrade():
+    op.execute("CREATE TABLE search_index (key BIGINT PRIMARY KEY, document TSVECTOR NOT NULL)")
+    op.execute("CREATE INDEX ix_search_index_document ON search_index USING GIN (document)")
+    branches = []
+    for table, kind, title, body in DOCUMENTS:
+        branches.append(f"""
+        IF TG_TABLE_NAME = '{table}' THEN
+            IF TG_OP <> 'INSERT' THEN
+                old_key := OLD.id::bigint * 4 + {kind};
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                new_key := NEW.id::bigint * 4 + {kind};
+                doc_title := {title.format(row='NEW.')};
+                doc_body := {body.format(row='NEW.')};
+            END IF;
+        END IF;""")
+    op.execute(f"""
+    CREATE FUNCTION search_index_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        old_key BIGINT;
+        new_key BIGINT;
+        doc_title TEXT;
+        doc_body TEXT;
+    BEGIN{''.join(branches)}
+        IF old_key IS NOT NULL AND old_key IS DISTINCT FROM new_key THEN
+            DELETE FROM search_index WHERE search_index.key = old_key;
+        END IF;
+        IF new_key IS NOT NULL THEN
+            INSERT INTO search_index (key, document) VALUES (new_key,
+                setweight(to_tsvector('simple', coalesce(doc_title, '')), 'A') || setweight(to_tsvector('simple', doc_body), 'B'))
+            ON CONFLICT (key) DO UPDATE SET document = EXCLUDED.document;
+        END IF;
+        RETURN NULL;
+    END $$
+    """)
+    for table, kind, title, body in DOCUMENTS:
+        op.execute(f"CREATE TRIGGER search_index_{table} AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                   f"FOR EACH ROW EXECUTE FUNCTION search_index_sync()")
+        op.execute(f"INSERT INTO search_index (key, document) SELECT id::bigint * 4 + {kind}, "
+                   f"setweight(to_tsvector('simple', coalesce({title.format(row='')}, '')), 'A') || "
+                   f"setweight(to_tsvector('simple', {body.format(row='')}), 'B') FROM {table}")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _sqlite_upgrade()
+    elif dialect == 'postgresql':
+        _postgresql_upgrade()
+    else:
+        # app.utils.search falls back to LIKE matching without the index
+        logger.warning('No full-text search index for %s; admin search will scan tables', dialect)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        return
+    for table, kind, title, body in DOCUMENTS:
+        if dialect == 'sqlite':
+            for event in ('insert', 'update', 'delete'):
+                op.execute(f"DROP TRIGGER IF EXISTS search_index_{table}_{event}")
+        else:
+            op.execute(f"DROP TRIGGER IF EXISTS search_index_{table} ON {table}")
+    if dialect != 'sqlite':
+        op.execute("DROP FUNCTION IF EXISTS search_index_sync()")
+    op.execute("DROP TABLE IF EXISTS search_index")
@@ -0,0 +1,122 @@
+"""packed answers
+
+Revision ID: ecee551346ce
+Revises: 2ef887052104
+Create Date: 2026-10-18 10:04:11.039171
+
+"""
+from itertools import groupby
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ecee551346ce'
+down_revision = '2ef887052104'
+branch_labels = None
+depends_on = None
+
+
+# Scores are backfilled in id ranges of this size
+BATCH_SIZE = 1000
+
+answer_maps = sa.Table('answer_maps', sa.MetaData(),
+    sa.Column('id', sa.Integer, primary_key=True), sa.Column('quiz_id', sa.Integer), sa.Column('question_ids', sa.Text))
+
+
+def _mask(value):
+    # Same as app.utils.grading.option_mask, frozen for this migration
+    mask = 0
+    for part in str(value or '').split(','):
+        part = part.strip()
+        if part.isdigit() and 1 <= int(part) <= 4:
+            mask |= 1 << (int(part) - 1)
+    return mask
+
+
+def _pack(masks):
+    masks = list(masks) + [0] * (len(masks) % 2)
+    return bytes(low | high << 4 for low, high in zip(masks[::2], masks[1::2]))
+
+
+def _unpack(data, count):
+    masks = []
+    for byte in data:
+        masks += [byte & 0x0F, byte >> 4]
+    return masks[:count]
+
+
+def _answer(mask):
+    options = [str(option) for option in range(1, 5) if mask & 1 << (option - 1)]
+    return ','.join(options) if len(options) > 1 else int(options[0]) if options else 0
+
+
+def upgrade():
+    op.create_table('answer_maps',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('question_ids', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('answer_maps', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_answer_maps_quiz_id'), ['quiz_id'], unique=False)
+
+    with op.batch_alter_table('scores', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('answer_map_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('packed_answers', sa.LargeBinary(), nullable=True))
+        batch_op.create_foreign_key('fk_scores_answer_map_id_answer_maps', 'answer_maps', ['answer_map_id'], ['id'])
+
+    # Pack every attempt's user_answers rows; the rows stay until `flask prune-answer-rows`
+    conn = op.get_bind()
+    maps = {}
+    last_id = conn.execute(sa.text('SELECT MAX(score_id) FROM user_answers')).scalar() or 0
+    for low in range(0, last_id, BATCH_SIZE):
+        rows = conn.execute(sa.text("""
+            SELECT score_id, quiz_id, question_id, selected_option FROM user_answers
+            WHERE score_id > :low AND score_id <= :high
+            ORDER BY score_id, question_id
+        """), {'low': low, 'high': low + BATCH_SIZE}).fetchall()
+        updates = []
+        for score_id, answers in groupby(rows, key=lambda row: row[0]):
+            answers = list(answers)
+            key = (answers[0][1], ','.join(str(row[2]) for row in answers))
+            if key not in maps:
+                maps[key] = conn.execute(answer_maps.insert().values(quiz_id=key[0], question_ids=key[1])).inserted_primary_key[0]
+            updates.append({'score_id': score_id, 'map_id': maps[key], 'packed': _pack([_mask(row[3]) for row in answers])})
+        if updates:
+            conn.execute(sa.text('UPDATE scores SET answer_map_id = :map_id, packed_answers = :packed WHERE id = :score_id')
+                         .bindparams(sa.bindparam('packed', type_=sa.LargeBinary)), updates)
+
+
+def downgrade():
+    # Restore rows for packed attempts whose rows were pruned
+    conn = op.get_bind()
+    question_ids = {map_id: [int(i) for i in ids.split(',') if i] for map_id, ids in
+                    conn.execute(sa.text('SELECT id, question_ids FROM answer_maps'))}
+    scores = conn.execute(sa.text("""
+        SELECT id, user_id, quiz_id, answer_map_id, packed_answers, timestamp_of_attempt FROM scores
+        WHERE packed_answers IS NOT NULL AND NOT EXISTS (SELECT 1 FROM user_answers WHERE user_answers.score_id = scores.id)
+    """)).fetchall()
+    rows = []
+    for score_id, user_id, quiz_id, map_id, packed, attempted_at in scores:
+        ids = question_ids[map_id]
+        rows += [{'user_id': user_id, 'quiz_id': quiz_id, 'score_id': score_id, 'question_id': question_id,
+                  'selected_option': _answer(mask), 'attempt_timestamp': attempted_at}
+                 for question_id, mask in zip(ids, _unpack(packed, len(ids)))]
+    if rows:
+        conn.execute(sa.text("""
+            INSERT INTO user_answers (user_id, quiz_id, score_id, question_id, selected_option, attempt_timestamp)
+            VALUES (:user_id, :quiz_id, :score_id, :question_id, :selected_option, :attempt_timestamp)
+        """), rows)
+
+    with op.batch_alter_table('scores', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_scores_answer_map_id_answer_maps', type_='foreignkey')
+        batch_op.drop_column('packed_answers')
+        batch_op.drop_column('answer_map_id')
+
+    with op.batch_alter_table('answer_maps', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_answer_maps_quiz_id'))
+
+    op.drop_table('answer_maps')
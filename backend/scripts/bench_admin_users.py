@@ -0,0 +1,45 @@
+"""
+Time GET /api/admin/users and count its SQL statements as the number of
+users grows; the statement count should stay constant.
+
+    python scripts/bench_admin_users.py [--users 50,500,2000] [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import db
+from app.utils.query_counts import create_scratch_app, seed_sample_data, auth_headers
+
+def bench(users, runs):
+    app = create_scratch_app()
+    with app.app_context():
+        admin_id, _ = seed_sample_data(users=users, subjects=2, chapters=2, quizzes=3)
+        headers = auth_headers(admin_id)
+        engine = db.engine
+    client = app.test_client()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    timings = []
+    for _ in range(runs):
+        statements.clear()
+        start = time.perf_counter()
+        response = client.get('/api/admin/users', headers=headers)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200 and len(response.json['users']) == users + 1
+    event.remove(engine, 'before_cursor_execute', listener)
+    print(f'{users:>6} users: {len(statements)} statements, median {statistics.median(timings) * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', default='50,500,2000', help='comma separated user counts')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+    for users in map(int, args.users.split(',')):
+        bench(users, args.runs)
@@ -0,0 +1,72 @@
+"""
+Compare ANSWER_STORAGE='rows' with 'packed': database size after many
+attempts of a long quiz, and the latency of loading one attempt's details.
+
+    python scripts/bench_answer_storage.py [--questions 200] [--attempts 2000] [--samples 200]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import db
+from app.models.answer import UserAnswer
+from app.models.quiz import Quiz
+from app.models.score import Score
+from app.utils.grading import get_answer_key
+from app.utils.query_counts import create_scratch_app, seed_sample_data, auth_headers
+
+def bench(mode, questions, attempts, samples, workdir):
+    path = os.path.join(workdir, f'{mode}.db')
+    app = create_scratch_app('sqlite:///' + path)
+    app.config['ANSWER_STORAGE'] = mode
+    rng = random.Random(1)
+    with app.app_context():
+        _, user_id = seed_sample_data(users=1, subjects=1, chapters=1, quizzes=1, questions=questions)
+        quiz_id = Quiz.query.first().id
+        answer_key = get_answer_key(quiz_id)
+        for _ in range(attempts):
+            result = answer_key.grade(answer_key.selection_masks(
+                {str(question_id): rng.randint(0, 4) for question_id in answer_key.question_ids}))
+            score = Score(user_id=user_id, quiz_id=quiz_id, total_scored=result.score, total_questions=questions,
+                          max_score=result.max_score, correct_answers=result.correct_count)
+            if mode == 'packed':
+                score.pack_answers(answer_key, result.selected)
+            db.session.add(score)
+            db.session.flush()
+            if mode == 'rows':
+                UserAnswer.insert_for_attempt(score, answer_key, result.selected)
+        db.session.commit()
+        score_ids = rng.sample([score_id for (score_id,) in db.session.query(Score.id)], samples)
+        headers = auth_headers(user_id)
+        db.engine.dispose()
+    connection = sqlite3.connect(path)
+    connection.execute('VACUUM')
+    connection.close()
+    client = app.test_client()
+    for score_id in score_ids[:20]:
+        client.get(f'/api/user/scores/{score_id}', headers=headers)  # warm up
+    timings = []
+    for score_id in score_ids:
+        start = time.perf_counter()
+        response = client.get(f'/api/user/scores/{score_id}', headers=headers)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200 and len(response.json['results']) == questions
+    print(f'{mode:>6}: database {os.path.getsize(path) / 1e6:.1f} MB, '
+          f'score details median {statistics.median(timings) * 1000:.2f} ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--questions', type=int, default=200)
+    parser.add_argument('--attempts', type=int, default=2000)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix='bench-answers-') as workdir:
+        for mode in ('rows', 'packed'):
+            bench(mode, args.questions, args.attempts, args.samples, workdir)
@@ -0,0 +1,72 @@
+"""
+Compare a quiz leaderboard read (top 10 plus the caller's rank) computed
+with a grouped SQL query against the sorted-set board, and time board
+updates and a full reload. Uses the in-memory store (no Redis).
+
+    python scripts/bench_leaderboards.py [--users 20000] [--attempts 3] [--reads 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+from app import db
+from app.models.quiz import Quiz
+from app.models.score import Score
+from app.models.user import User
+from app.utils import leaderboards
+from app.utils.query_counts import create_scratch_app, seed_sample_data
+
+def per_call(function, calls):
+    function()  # warm up
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls
+
+def main(users, attempts, reads):
+    app = create_scratch_app()
+    rng = random.Random(1)
+    with app.app_context():
+        seed_sample_data(users=1, subjects=1, chapters=1, quizzes=1, questions=4)
+        quiz = Quiz.query.first()
+        quiz_id, subject_id = quiz.id, quiz.chapter.subject_id
+        db.session.execute(User.__table__.insert(), [
+            {'email': f'bench{i}@example.com', 'password_hash': '!', 'full_name': f'Bench {i}',
+             'qualification': '', 'dob': date(2000, 1, 1), 'role': 'user'} for i in range(users)])
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).filter_by(role='user')]
+        db.session.execute(Score.__table__.insert(), [
+            {'user_id': rng.choice(user_ids), 'quiz_id': quiz_id, 'total_scored': rng.randint(0, 8),
+             'total_questions': 4, 'max_score': 8, 'correct_answers': 0, 'time_taken': 60}
+            for _ in range(users * attempts)])
+        db.session.commit()
+    me = user_ids[len(user_ids) // 2]
+    with app.test_request_context():
+        def grouped_sql():
+            best = db.session.query(Score.user_id, func.max(Score.percentage).label('best')) \
+                .filter(Score.quiz_id == quiz_id).group_by(Score.user_id).subquery()
+            db.session.query(best.c.user_id, best.c.best).order_by(best.c.best.desc()).limit(10).all()
+            mine = db.session.query(func.max(Score.percentage)).filter(Score.quiz_id == quiz_id, Score.user_id == me).scalar()
+            db.session.query(func.count()).select_from(best).filter(best.c.best > (mine or 0)).scalar()
+        start = time.perf_counter()
+        leaderboards.rebuild_leaderboards()
+        reload = time.perf_counter() - start
+        board = lambda: leaderboards.leaderboard(leaderboards.QUIZ_BOARD_KEY.format(quiz_id), me, 10)
+        record = lambda: leaderboards.record_score(rng.choice(user_ids), quiz_id, subject_id, rng.random() * 100)
+        print(f'{users} users, {users * attempts} scores on one quiz')
+        print(f'  grouped SQL query  {per_call(grouped_sql, reads) * 1000:.2f} ms per read')
+        print(f'  board              {per_call(board, reads) * 1000:.2f} ms per read (one SQL query, for the names)')
+        print(f'  update on submit   {per_call(record, 1000) * 1e6:.1f} us; full reload {reload * 1000:.0f} ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--attempts', type=int, default=3, help='scores per user, on average')
+    parser.add_argument('--reads', type=int, default=50)
+    args = parser.parse_args()
+    main(args.users, args.attempts, args.reads)
@@ -0,0 +1,53 @@
+"""
+Render monthly reports (five attempts each) from the Jinja2 template, and
+optionally as PDF, and report reports per second. Nothing touches the
+database or sends mail.
+
+    python scripts/bench_monthly_reports.py [--reports 50000] [--pdf-reports 500]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.score import Score
+from app.utils.query_counts import create_scratch_app
+from app.utils.reports import build_monthly_report, render_monthly_report_html, render_monthly_report_pdf
+
+def sample_report(until):
+    scores = [(Score(total_scored=3 + i, total_questions=10, max_score=10, correct_answers=3 + i, time_taken=95 + i,
+                     timestamp_of_attempt=until - timedelta(days=i)), f'Quiz <{i}> & more') for i in range(5)]
+    user = SimpleNamespace(full_name='Ada "Test" Lovelace')
+    return build_monthly_report(user, scores, until - timedelta(days=30), until)
+
+def rate(count, render, report):
+    start = time.perf_counter()
+    for _ in range(count):
+        render(report)
+    elapsed = time.perf_counter() - start
+    return elapsed, count / elapsed
+
+def main(reports, pdf_reports):
+    app = create_scratch_app()
+    with app.app_context():
+        report = sample_report(datetime(2026, 10, 1))
+        render_monthly_report_html(report)  # compile the template once, as a worker does
+        elapsed, per_second = rate(reports, render_monthly_report_html, report)
+        print(f'HTML: {reports} reports in {elapsed:.2f} s, {per_second:,.0f} per second')
+        if pdf_reports:
+            if render_monthly_report_pdf(report) is None:
+                print('PDF: skipped, reportlab is not installed')
+                return
+            elapsed, per_second = rate(pdf_reports, render_monthly_report_pdf, report)
+            print(f'PDF:  {pdf_reports} reports in {elapsed:.2f} s, {per_second:,.0f} per second')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reports', type=int, default=50000)
+    parser.add_argument('--pdf-reports', type=int, default=500, help='0 skips the PDF run')
+    args = parser.parse_args()
+    main(args.reports, args.pdf_reports)
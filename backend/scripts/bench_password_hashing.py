@@ -0,0 +1,64 @@
+"""
+Log in concurrently while a probe request runs every 10 ms, for bcrypt
+costs and hashing thread counts, and report logins per second per core
+and the probe's p95 latency: hashing must not starve other requests.
+
+    python scripts/bench_password_hashing.py [--rounds 10,12] [--workers 1,16] [--logins 48] [--clients 16]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import db
+from app.models.user import User
+from app.utils import passwords
+from app.utils.query_counts import create_scratch_app, seed_sample_data, auth_headers
+
+def bench(rounds, workers, logins, clients):
+    app = create_scratch_app()
+    app.config.update(PASSWORD_HASH_ROUNDS=rounds, PASSWORD_HASH_WORKERS=workers, PASSWORD_HASH_QUEUE_MAX=logins)
+    passwords._hasher = None  # rebuilt from this app's config
+    with app.app_context():
+        _, user_id = seed_sample_data(users=1, subjects=1, chapters=1, quizzes=1)
+        user = db.session.get(User, user_id)
+        user.set_password('secret')
+        db.session.commit()
+        email, headers = user.email, auth_headers(user_id)
+    probe_timings, done = [], threading.Event()
+    def probe():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/api/auth/me', headers=headers)
+            probe_timings.append(time.perf_counter() - start)
+            time.sleep(0.01)
+    prober = threading.Thread(target=probe)
+    prober.start()
+    login = lambda _: app.test_client().post('/api/auth/login', json={'email': email, 'password': 'secret'}).status_code
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        codes = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+    assert set(codes) == {200}, codes
+    p95 = statistics.quantiles(probe_timings, n=20)[-1] if len(probe_timings) > 1 else probe_timings[0]
+    print(f'cost {rounds}, {workers:>2} workers: {logins / elapsed / (os.cpu_count() or 1):.1f} logins/s per core, '
+          f'probe p95 {p95 * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', default='10,12', help='comma separated bcrypt costs')
+    parser.add_argument('--workers', default='1,16', help='comma separated hashing thread counts')
+    parser.add_argument('--logins', type=int, default=48)
+    parser.add_argument('--clients', type=int, default=16)
+    args = parser.parse_args()
+    for rounds in map(int, args.rounds.split(',')):
+        for workers in map(int, args.workers.split(',')):
+            bench(rounds, workers, args.logins, args.clients)
@@ -0,0 +1,42 @@
+"""
+Run send_reminder_email in-process (no broker), the way a Celery worker
+runs it, against a file SQLite database, and report tasks per second.
+Mail goes to .eml files in a temporary directory.
+
+    python scripts/bench_reminder_tasks.py [--tasks 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main(tasks, workdir):
+    os.environ.update({
+        'DATABASE_URL': 'sqlite:///' + os.path.join(workdir, 'bench.db'),
+        'CACHE_TYPE': 'SimpleCache',
+        'MAIL_BACKEND': 'file',
+        'MAIL_FILE_SINK_DIR': os.path.join(workdir, 'outbox'),
+        'MAIL_DEFAULT_SENDER': 'quizmaster@example.com'
+    })
+    from app.tasks.celery_tasks import get_flask_app, send_reminder_email
+    from app.utils.query_counts import seed_sample_data
+    with get_flask_app().app_context():
+        seed_sample_data(users=10, subjects=1, chapters=1, quizzes=1)
+        from app.models.user import User
+        user_ids = [user_id for (user_id,) in User.query.with_entities(User.id).filter_by(role='user')]
+    send_reminder_email(user_ids[0], 1)  # warm up: templates, mappers, the SQLite file
+    start = time.perf_counter()
+    for i in range(tasks):
+        result = send_reminder_email(user_ids[i % len(user_ids)], 1)
+    elapsed = time.perf_counter() - start
+    assert result.startswith('Reminder email sent'), result
+    print(f'{tasks} tasks in {elapsed:.2f} s: {tasks / elapsed:.0f} tasks/sec')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=500)
+    with tempfile.TemporaryDirectory(prefix='bench-reminders-') as workdir:
+        main(parser.parse_args().tasks, workdir)
@@ -0,0 +1,69 @@
+"""
+Time admin search over many questions: the full-text index against the
+LIKE fallback used without it, and against loading a quiz's whole
+question list. Builds the schema through the migrations, which create
+the index and its triggers.
+
+    python scripts/bench_search.py [--questions 30000] [--queries 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+import flask_migrate
+from app import db
+from app.commands import ensure_admin
+from app.models.quiz import Quiz, Question
+from app.models.subject import Subject, Chapter
+from app.utils.query_counts import create_scratch_app
+from app.utils.search import search, search_terms, load_results, _like_matches
+
+def per_query(function, terms):
+    function(terms[0])  # warm up
+    start = time.perf_counter()
+    for term in terms:
+        function(term)
+    return (time.perf_counter() - start) / len(terms)
+
+def main(questions, queries, workdir):
+    app = create_scratch_app('sqlite:///' + os.path.join(workdir, 'search.db'))
+    rng = random.Random(3)
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    with app.app_context():
+        flask_migrate.upgrade(directory=os.path.join(BACKEND, 'migrations'))
+        ensure_admin('admin@quizmaster.com', 'admin123')
+        subject = Subject(name='Subject')
+        chapter = Chapter(name='Chapter', subject=subject)
+        quiz = Quiz(title='Quiz', chapter=chapter, creator_id=1, duration=10)
+        db.session.add_all([subject, chapter, quiz])
+        db.session.flush()
+        start = time.perf_counter()
+        db.session.execute(Question.__table__.insert(), [
+            dict(quiz_id=quiz.id, question_statement=' '.join(rng.choices(words, k=12)), option1=rng.choice(words),
+                 option2=rng.choice(words), option3=rng.choice(words), option4=rng.choice(words),
+                 correct_answer='1', marks=1, negative_marks=0, type='single') for _ in range(questions)])
+        db.session.commit()
+        print(f'{questions} questions inserted (index kept in sync by triggers) in {time.perf_counter() - start:.2f} s')
+        quiz_id = quiz.id
+    with app.test_request_context():
+        terms = [word[:4] for word in rng.sample(words, queries)]
+        indexed = lambda term: load_results(search(term, ['question'], 20))
+        like = lambda term: list(_like_matches(search_terms(term), ['question'], 20, None))
+        full_list = lambda term: [question.to_dict() for question in Question.query.filter_by(quiz_id=quiz_id)]
+        print(f'  full-text index, ranked top 20  {per_query(indexed, terms) * 1000:.2f} ms per query')
+        print(f'  LIKE fallback, top 20           {per_query(like, terms) * 1000:.2f} ms per query')
+        print(f'  whole question list             {per_query(full_list, terms[:5]) * 1000:.0f} ms per load')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--questions', type=int, default=30000)
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix='bench-search-') as workdir:
+        main(args.questions, args.queries, workdir)
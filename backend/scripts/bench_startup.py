@@ -0,0 +1,68 @@
+"""
+Time a cold start in fresh interpreters: importing the app, create_app,
+the first request (a failed login), and building the Celery worker's app.
+Prints the median of several runs against a throwaway SQLite database.
+
+    python scripts/bench_startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_web():
+    start = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    response = app.test_client().post('/api/auth/login', json={'email': 'nobody@example.com', 'password': 'x'})
+    responded = time.perf_counter()
+    assert response.status_code in (400, 401), response.status_code
+    return {'import': imported - start, 'create_app': created - imported,
+            'first request': responded - created, 'total': responded - start}
+
+def measure_worker():
+    start = time.perf_counter()
+    from app.tasks.celery_tasks import get_flask_app
+    get_flask_app()
+    return {'worker app': time.perf_counter() - start}
+
+def run_child(kind, env):
+    output = subprocess.run([sys.executable, __file__, '--child', kind], env=env, cwd=BACKEND,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(runs):
+    with tempfile.TemporaryDirectory(prefix='bench-startup-') as workdir:
+        env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(workdir, 'startup.db'), CACHE_TYPE='SimpleCache')
+        # The schema is created once up front; startup itself must not touch the database
+        from app.utils.query_counts import create_scratch_app
+        app = create_scratch_app(env['DATABASE_URL'])
+        with app.app_context():
+            from app import db
+            db.create_all()
+        samples = {}
+        for _ in range(runs):
+            for kind in ('web', 'worker'):
+                for name, seconds in run_child(kind, env).items():
+                    samples.setdefault(name, []).append(seconds)
+    for name, values in samples.items():
+        print(f'{name:>14}: {statistics.median(values) * 1000:.0f} ms')
+
+if __name__ == '__main__':
+    sys.path.insert(0, BACKEND)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', choices=['web', 'worker'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(measure_web() if args.child == 'web' else measure_worker()))
+    else:
+        main(args.runs)
@@ -0,0 +1,52 @@
+"""
+Time POST /api/quiz/<id>/submit and count the statements that write its
+answers as the paper grows; user_answers should take one INSERT per submit.
+
+    python scripts/bench_submit_answers.py [--questions 10,50,200] [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import db
+from app.models.quiz import Quiz
+from app.utils.query_counts import create_scratch_app, seed_sample_data, auth_headers
+
+def bench(questions, runs):
+    app = create_scratch_app()
+    app.config['ANSWER_STORAGE'] = 'rows'
+    with app.app_context():
+        _, user_id = seed_sample_data(users=1, subjects=1, chapters=1, quizzes=1, questions=questions)
+        quiz = Quiz.query.first()
+        quiz_id, answers = quiz.id, {str(question.id): 1 for question in quiz.questions}
+        headers = auth_headers(user_id)
+        engine = db.engine
+    client = app.test_client()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    timings = []
+    for _ in range(runs):
+        client.get(f'/api/quiz/{quiz_id}/start', headers=headers)
+        statements.clear()
+        start = time.perf_counter()
+        response = client.post(f'/api/quiz/{quiz_id}/submit', headers=headers, json={'answers': answers})
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    event.remove(engine, 'before_cursor_execute', listener)
+    inserts = sum(statement.startswith('INSERT INTO user_answers') for statement in statements)
+    print(f'{questions:>4} questions: {inserts} user_answers INSERT, {len(statements)} statements, '
+          f'median submit {statistics.median(timings) * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--questions', default='10,50,200', help='comma separated paper sizes')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+    for questions in map(int, args.questions.split(',')):
+        bench(questions, args.runs)
@@ -60,8 +60,10 @@ export const userAPI = {
   getQuizzes: () => api.get('/user/quizzes'),
   getSubjects: () => api.get('/user/subjects'),
   getScores: (params = {}) => api.get('/user/scores', { params }),
+  getScoreDetails: (scoreId) => api.get(`/user/scores/${scoreId}`),
   getProfile: () => api.get('/user/profile'),
   updateProfile: (data) => api.put('/user/profile', data),
+  getSubjectLeaderboard: (subjectId, params = {}) => api.get(`/user/subjects/${subjectId}/leaderboard`, { params }),
 
 };
 
@@ -70,8 +72,10 @@ export const userAPI = {
 export const quizAPI = {
   getQuizDetails: (id) => api.get(`/quiz/${id}/details`),
   startQuiz: (id) => api.get(`/quiz/${id}/start`),
+  saveAnswers: (id, data) => api.put(`/quiz/${id}/answers`, data),
   submitQuiz: (id, data) => api.post(`/quiz/${id}/submit`, data),
-  getQuizAttempt: (scoreId) => api.get(`/quiz/attempt/${scoreId}`)
+  getQuizAttempt: (scoreId) => api.get(`/quiz/attempt/${scoreId}`),
+  getLeaderboard: (id, params = {}) => api.get(`/quiz/${id}/leaderboard`, { params })
 };
 
 // Admin API
@@ -80,6 +84,7 @@ export const adminAPI = {
   getDashboardStats: () => api.get('/admin/dashboard/stats'),
   getChartData: () => api.get('/admin/dashboard/chart-data'),
   exportUsers: () => api.get('/admin/users/export', { responseType: 'blob' }),
+  search: (params) => api.get('/admin/search', { params }),
 
   // Subjects
   getSubjects: () => api.get('/admin/subjects'),
@@ -117,9 +117,9 @@ export default {
       try {
         dispatch('setLoading', true, { root: true })
         
+        // Timing comes from the server-side quiz session
         const submitData = {
-          answers: state.answers,
-          start_time: state.startTime
+          answers: state.answers
         }
         
         const response = await quizAPI.submitQuiz(quizId, submitData)
@@ -35,6 +35,9 @@ call venv\Scripts\activate
 echo Installing backend dependencies...
 pip install -r requirements.txt
 
+echo Initializing database...
+flask init-db
+
 echo.
 echo Starting Backend Server...
 start cmd /k "title Backend Server && call venv\Scripts\activate && python run.py"
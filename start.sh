@@ -32,6 +32,9 @@ source venv/bin/activate
 echo "Installing backend dependencies..."
 pip install -r requirements.txt
 
+echo "Initializing database..."
+flask init-db
+
 echo
 echo "Starting Backend Server..."
 gnome-terminal --title="Backend Server" -- bash -c "source venv/bin/activate && python run.py; exec bash" 2>/dev/null || \